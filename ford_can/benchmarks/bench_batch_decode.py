@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Compares decoding a synthetic recording frame by frame through
+FordCAN._on_message with the vectorized batch.decode.
+
+  ./bench_batch_decode.py --frames 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "nodes"))
+
+import can
+import numpy
+
+import batch
+import fordcan
+
+def synthetic_frames(count, seed = 0):
+    """
+    Responses to the default queries in roughly the mix the poller asks for,
+    including multi-frame GPS responses.
+    """
+    rng = random.Random(seed)
+    records = [
+        (fordcan.ECU_RESPONSE, b"\x62\x15\x05", 2),
+        (fordcan.ECU_RESPONSE, b"\x62\xdd\x01", 3),
+        (fordcan.ECU_RESPONSE, b"\x62\x03\x2b", 1),
+        (fordcan.ECU_RESPONSE, b"\x41\x0c", 2),
+        (fordcan.ABS_RESPONSE, b"\x62\x33\x02", 2),
+        (fordcan.ABS_RESPONSE, b"\x62\x33\x02", 2),
+        (fordcan.ABS_RESPONSE, b"\x62\x33\x02", 2),
+        (fordcan.ABS_RESPONSE, b"\x62\x20\x34", 2),
+        (fordcan.BC_RESPONSE, b"\x62\x41\x1f", 1),
+        (fordcan.API_RESPONSE, b"\x62\x80\x12", 15),
+    ]
+    frames = numpy.zeros(count, dtype = batch.FRAME_DTYPE)
+    i = 0
+    t = 0.0
+    while i < count:
+        arbitration_id, header, length = rng.choice(records)
+        payload = header + bytes(rng.randrange(256) for _ in range(length))
+        if len(payload) <= 7:
+            chunks = [bytes([len(payload)]) + payload]
+        else:
+            chunks = [bytes([0x10, len(payload)]) + payload[:6]]
+            for k, position in enumerate(range(6, len(payload), 7)):
+                chunks.append(bytes([0x20 | ((k + 1) & 0x0f)]) + payload[position:position + 7])
+        for chunk in chunks:
+            if i == count:
+                break
+            t += 0.0002
+            frames[i]["timestamp"] = t
+            frames[i]["arbitration_id"] = arbitration_id
+            frames[i]["dlc"] = 8
+            frames[i]["data"] = list(chunk + b"\x55" * (8 - len(chunk)))
+            i += 1
+    return frames
+
+class NullBus(object):
+    def send(self, message):
+        pass
+
+def run_per_frame(frames):
+    f = fordcan.FordCAN(channel = "bench_batch_decode", bustype = "virtual")
+    # flow control frames go nowhere
+    for channel in f.channels.values():
+        channel.bus = NullBus()
+    messages = [can.Message(arbitration_id = int(row["arbitration_id"]), data = bytearray(row["data"]),
+        extended_id = False) for row in frames]
+    t0 = time.perf_counter()
+    for message in messages:
+        f._on_message(message)
+    return time.perf_counter() - t0
+
+def run_batch(frames):
+    t0 = time.perf_counter()
+    batch.decode(frames)
+    return time.perf_counter() - t0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "batch decode benchmark")
+    parser.add_argument("--frames", type = int, default = 200000)
+    args = parser.parse_args()
+
+    frames = synthetic_frames(args.frames)
+    elapsed_per_frame = run_per_frame(frames)
+    elapsed_batch = run_batch(frames)
+    print("per frame: %.0f frames/s" % (len(frames) / elapsed_per_frame))
+    print("batch:     %.0f frames/s (%.1fx)" % (len(frames) / elapsed_batch, elapsed_per_frame / elapsed_batch))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Measures frame-arrival-to-callback latency and burst throughput of the
+FordCAN receive path on a python-can virtual bus. No hardware needed.
+
+  ./bench_receive.py --frames 5000
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "nodes"))
+
+import can
+import fordcan
+
+def speed_response(seq):
+    # speed response carrying the sequence number as raw value
+    return can.Message(arbitration_id = fordcan.ECU_RESPONSE,
+            data=[0x05, 0x62, 0x15, 0x05, (seq >> 8) & 0xff, seq & 0xff, 0x00, 0x00],
+            extended_id=False)
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return float('nan')
+    return values[min(int(len(values) * p / 100.0), len(values) - 1)]
+
+def run_latency(channel, frames, interval):
+    f = fordcan.FordCAN(channel = channel, bustype = 'virtual')
+    sender = can.interface.Bus(channel = channel, bustype = 'virtual')
+
+    sent = [0.0] * frames
+    latencies = []
+    def on_speed(value, timestamp):
+        latencies.append(time.perf_counter() - sent[int(value * 128.0)])
+    f.on_speed = on_speed
+
+    # only the receive side is exercised
+    f.thread_input = threading.Thread(target = f._input_loop)
+    f.thread_input.daemon = True
+    f.thread_input.start()
+
+    messages = [speed_response(i) for i in range(frames)]
+    for i in range(frames):
+        sent[i] = time.perf_counter()
+        sender.send(messages[i])
+        time.sleep(interval)
+    time.sleep(0.2)
+    f.stop()
+    f.thread_input.join()
+    sender.shutdown()
+    f.bus.shutdown()
+    return latencies
+
+def run_burst(channel, frames):
+    f = fordcan.FordCAN(channel = channel, bustype = 'virtual')
+    sender = can.interface.Bus(channel = channel, bustype = 'virtual')
+
+    done = threading.Event()
+    count = [0]
+    def on_speed(value, timestamp):
+        count[0] += 1
+        if count[0] == frames:
+            done.set()
+    f.on_speed = on_speed
+
+    messages = [speed_response(i) for i in range(frames)]
+    for message in messages:
+        sender.send(message)
+
+    # frames are already queued, time how long it takes to drain them
+    f.thread_input = threading.Thread(target = f._input_loop)
+    f.thread_input.daemon = True
+    t0 = time.perf_counter()
+    f.thread_input.start()
+    done.wait(60.0)
+    elapsed = time.perf_counter() - t0
+    f.stop()
+    f.thread_input.join()
+    sender.shutdown()
+    f.bus.shutdown()
+    return count[0], elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--frames", type = int, default = 2000)
+    parser.add_argument("--interval", type = float, default = 0.0005,
+            help = "seconds between frames in the latency run")
+    args = parser.parse_args()
+
+    latencies = run_latency("bench_receive_latency", args.frames, args.interval)
+    print("latency over %d frames (us): p50 %.1f  p90 %.1f  p99 %.1f  max %.1f" % (
+        len(latencies),
+        percentile(latencies, 50) * 1e6,
+        percentile(latencies, 90) * 1e6,
+        percentile(latencies, 99) * 1e6,
+        max(latencies) * 1e6 if latencies else float('nan')))
+
+    count, elapsed = run_burst("bench_receive_burst", args.frames * 10)
+    print("burst: %d frames in %.3f s, %.0f frames/s" % (count, elapsed, count / elapsed))
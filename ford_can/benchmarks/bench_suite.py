@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the decode-to-publish path, on python-can virtual buses
+with the simulator standing in for the car. Measures
+
+  decode   per-frame decode cost of the responses of each module
+  input    frames/s through _input_loop
+  latency  request-to-callback latency percentiles per polled signal
+  publish  CPU time of the FordCAN and PublishStage threads per published
+           message
+
+and writes the results as JSON, optionally comparing with an earlier run:
+
+  ./bench_suite.py --output jetson-before.json
+  ./bench_suite.py --output jetson-after.json --compare jetson-before.json
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "nodes"))
+
+import can
+
+import fordcan
+import publisher
+import simulator
+from bench_receive import percentile, run_burst
+
+MODULE_NAMES = {
+    fordcan.ECU_QUERY: "ecu",
+    fordcan.ABS_QUERY: "abs",
+    fordcan.BC_QUERY: "bc",
+    fordcan.API_QUERY: "api",
+}
+
+class NullBus(object):
+    def send(self, message):
+        pass
+
+class FakeMessage(object):
+    __slots__ = ("data",)
+
+class FakePublisher(object):
+    def __init__(self):
+        self.count = 0
+
+    def publish(self, message):
+        self.count += 1
+
+def response_frames(module, sim):
+    """
+    The frames of one simulated response of every DID the module is polled
+    for, one list of frames per response.
+    """
+    responses = []
+    for (response_id, service, did), (signals, record_length) in sim.registry.table.items():
+        if response_id != module + 8:
+            continue
+        request_service = 0x01 if service == 0x41 else 0x22
+        request = bytes([request_service]) + did.to_bytes(2 if service == 0x62 else 1, "big")
+        payload = sim.respond(module, request, 1.0)
+        if len(payload) <= 7:
+            data = [len(payload)] + list(payload)
+            frames = [data + [0x55] * (8 - len(data))]
+        else:
+            frames = [[0x10 | (len(payload) >> 8), len(payload) & 0xff] + list(payload[:6])]
+            for k, position in enumerate(range(6, len(payload), 7)):
+                data = [0x20 | ((k + 1) & 0x0f)] + list(payload[position:position + 7])
+                frames.append(data + [0x55] * (8 - len(data)))
+        responses.append([can.Message(arbitration_id = module + 8, data = data, extended_id = False)
+            for data in frames])
+    return responses
+
+def run_decode(iterations):
+    f = fordcan.FordCAN(channel = "bench_suite_decode", bustype = "virtual")
+    # flow control frames are not part of the decode cost
+    for channel in f.channels.values():
+        channel.bus = NullBus()
+    sim = simulator.EcuSimulator(bus = NullBus())
+    results = {}
+    for module, name in MODULE_NAMES.items():
+        messages = [message for response in response_frames(module, sim) for message in response]
+        t0 = time.perf_counter()
+        for _ in range(iterations):
+            for message in messages:
+                f._on_message(message)
+        elapsed = time.perf_counter() - t0
+        results[name] = {"frames": iterations * len(messages),
+            "ns_per_frame": elapsed / (iterations * len(messages)) * 1e9}
+    f.bus.shutdown()
+    return results
+
+def run_input(frames):
+    count, elapsed = run_burst("bench_suite_input", frames)
+    return {"frames": count, "frames_per_s": count / elapsed}
+
+def run_simulated(channel, duration, rate, setup = None, finish = None):
+    """
+    Runs FordCAN against the simulator for duration seconds, polling every
+    signal at rate Hz. setup(f) is called before starting it, finish(f)
+    before stopping it.
+    """
+    sim = simulator.EcuSimulator(channel = channel, bustype = "virtual", seed = 0)
+    sim.start()
+    f = fordcan.FordCAN(channel = channel, bustype = "virtual",
+        rates = dict((name, rate) for name in fordcan.DEFAULT_RATES))
+    if setup is not None:
+        setup(f)
+    f.start()
+    time.sleep(duration)
+    if finish is not None:
+        finish(f)
+    f.stop()
+    sim.stop()
+    time.sleep(0.2)
+    f.bus.shutdown()
+    sim.bus.shutdown()
+
+def run_latency(duration, rate):
+    latencies = {}
+    def setup(f):
+        entries = f.scheduler.entries
+        for name in entries:
+            def on_value(value, timestamp, name = name):
+                latencies[name].append(time.monotonic() - entries[name]["last_sent"])
+            latencies[name] = []
+            setattr(f, "on_" + name, on_value)
+    run_simulated("bench_suite_latency", duration, rate, setup)
+    results = {}
+    for name, values in sorted(latencies.items()):
+        results[name] = {"samples": len(values),
+            "p50_us": percentile(values, 50) * 1e6,
+            "p90_us": percentile(values, 90) * 1e6,
+            "p99_us": percentile(values, 99) * 1e6}
+    return results
+
+def thread_cpu_time(threads):
+    total = 0.0
+    for thread in threads:
+        if thread.is_alive():
+            total += time.clock_gettime(time.pthread_getcpuclockid(thread.ident))
+    return total
+
+def fill_scalar(m, value, timestamp):
+    m.data = value
+
+def run_publish(duration, rate, publish_rate):
+    # wired as ford_can_node does: the callbacks store the samples in a
+    # PublishStage, whose thread fills one message per topic and publishes it
+    stage = publisher.PublishStage(publish_rate)
+    publishers = []
+    cpu = {}
+    def setup(f):
+        for name in f.stats:
+            setattr(f, "on_" + name, functools.partial(stage.update, name))
+            publishers.append(FakePublisher())
+            stage.add(name, publishers[-1].publish, FakeMessage(), fill_scalar)
+        stage.start()
+    def finish(f):
+        # the threads are created by start(), so their CPU time is all spent
+        # in this run
+        cpu["total"] = thread_cpu_time([f.thread_input, f.thread_output, f.thread_monitor, stage.thread])
+        stage.stop()
+    run_simulated("bench_suite_publish", duration, rate, setup, finish)
+    published = sum(p.count for p in publishers)
+    return {"published": published, "published_per_s": published / duration,
+        "cpu_us_per_message": cpu["total"] / published * 1e6 if published else float('nan')}
+
+def compare(results, baseline, path = ()):
+    for key, value in results.items():
+        if key == "meta":
+            continue
+        old = baseline.get(key) if isinstance(baseline, dict) else None
+        if isinstance(value, dict):
+            compare(value, old or {}, path + (key,))
+        elif isinstance(value, (int, float)) and isinstance(old, (int, float)) and old:
+            print("%-50s %12.1f %12.1f %+7.1f%%" % (".".join(path + (key,)), old, value,
+                (value - old) / old * 100.0))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "FordCAN benchmark suite")
+    parser.add_argument("--output", default = "bench_suite.json")
+    parser.add_argument("--compare", default = None, help = "results of an earlier run")
+    parser.add_argument("--iterations", type = int, default = 2000)
+    parser.add_argument("--frames", type = int, default = 50000)
+    parser.add_argument("--duration", type = float, default = 5.0)
+    parser.add_argument("--rate", type = float, default = 100.0, help = "poll rate of every signal in Hz")
+    parser.add_argument("--publish-rate", type = float, default = 100.0, help = "PublishStage rate in Hz")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "python": platform.python_version(),
+            "python_can": can.__version__,
+            "args": vars(args),
+        },
+        "decode": run_decode(args.iterations),
+        "input": run_input(args.frames),
+        "latency": run_latency(args.duration, args.rate),
+        "publish": run_publish(args.duration, args.rate, args.publish_rate),
+    }
+    print(json.dumps(results, indent = 2, sort_keys = True))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent = 2, sort_keys = True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print("%-50s %12s %12s %8s" % ("", "before", "after", "change"))
+        compare(results, baseline)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Compares the allocation-free paths of quaternion_from_euler,
+quaternion_from_yaw, quaternion_multiply and quaternion_matrix in
+transformations.py with the implementations they replaced, kept below as
+reference.
+
+  ./bench_transformations.py --calls 200000
+"""
+import argparse
+import math
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "nodes"))
+
+import numpy
+
+import transformations
+from transformations import _AXES2TUPLE, _NEXT_AXIS, _TUPLE2AXES
+
+def reference_quaternion_from_euler(ai, aj, ak, axes='sxyz'):
+    try:
+        firstaxis, parity, repetition, frame = _AXES2TUPLE[axes.lower()]
+    except (AttributeError, KeyError):
+        _TUPLE2AXES[axes]
+        firstaxis, parity, repetition, frame = axes
+    i = firstaxis + 1
+    j = _NEXT_AXIS[i+parity-1] + 1
+    k = _NEXT_AXIS[i-parity] + 1
+    if frame:
+        ai, ak = ak, ai
+    if parity:
+        aj = -aj
+    ai /= 2.0
+    aj /= 2.0
+    ak /= 2.0
+    ci = math.cos(ai)
+    si = math.sin(ai)
+    cj = math.cos(aj)
+    sj = math.sin(aj)
+    ck = math.cos(ak)
+    sk = math.sin(ak)
+    cc = ci*ck
+    cs = ci*sk
+    sc = si*ck
+    ss = si*sk
+    q = numpy.empty((4, ))
+    if repetition:
+        q[0] = cj*(cc - ss)
+        q[i] = cj*(cs + sc)
+        q[j] = sj*(cc + ss)
+        q[k] = sj*(cs - sc)
+    else:
+        q[0] = cj*cc + sj*ss
+        q[i] = cj*sc - sj*cs
+        q[j] = cj*ss + sj*cc
+        q[k] = cj*cs - sj*sc
+    if parity:
+        q[j] *= -1.0
+    return q
+
+def reference_quaternion_multiply(quaternion1, quaternion0):
+    w0, x0, y0, z0 = quaternion0
+    w1, x1, y1, z1 = quaternion1
+    return numpy.array([
+        -x1*x0 - y1*y0 - z1*z0 + w1*w0,
+        x1*w0 + y1*z0 - z1*y0 + w1*x0,
+        -x1*z0 + y1*w0 + z1*x0 + w1*y0,
+        x1*y0 - y1*x0 + z1*w0 + w1*z0], dtype=numpy.float64)
+
+def reference_quaternion_matrix(quaternion):
+    q = numpy.array(quaternion, dtype=numpy.float64, copy=True)
+    n = numpy.dot(q, q)
+    if n < transformations._EPS:
+        return numpy.identity(4)
+    q *= math.sqrt(2.0 / n)
+    q = numpy.outer(q, q)
+    return numpy.array([
+        [1.0-q[2, 2]-q[3, 3],     q[1, 2]-q[3, 0],     q[1, 3]+q[2, 0], 0.0],
+        [    q[1, 2]+q[3, 0], 1.0-q[1, 1]-q[3, 3],     q[2, 3]-q[1, 0], 0.0],
+        [    q[1, 3]-q[2, 0],     q[2, 3]+q[1, 0], 1.0-q[1, 1]-q[2, 2], 0.0],
+        [                0.0,                 0.0,                 0.0, 1.0]])
+
+def check():
+    # the fast paths must agree with the reference on random inputs
+    rng = numpy.random.default_rng(0)
+    q = numpy.empty(4)
+    m = numpy.empty((4, 4))
+    for _ in range(1000):
+        ai, aj, ak = rng.uniform(-math.pi, math.pi, 3)
+        for axes in _AXES2TUPLE:
+            assert numpy.allclose(transformations.quaternion_from_euler(ai, aj, ak, axes, out=q),
+                reference_quaternion_from_euler(ai, aj, ak, axes))
+        assert numpy.allclose(transformations.quaternion_from_yaw(ak),
+            reference_quaternion_from_euler(0.0, 0.0, ak))
+        q0, q1 = rng.normal(size = (2, 4))
+        assert numpy.allclose(transformations.quaternion_multiply(q1, q0, out=q),
+            reference_quaternion_multiply(q1, q0))
+        assert numpy.allclose(transformations.quaternion_matrix(q0, out=m),
+            reference_quaternion_matrix(q0))
+
+def run(calls):
+    q = numpy.empty(4)
+    m = numpy.empty((4, 4))
+    q0 = transformations.quaternion_from_euler(0.1, 0.2, 0.3)
+    q1 = transformations.quaternion_from_euler(-0.3, 0.1, 1.2)
+    namespace = dict(globals(), q = q, m = m, q0 = q0, q1 = q1, t = transformations)
+    cases = [
+        ("quaternion_from_euler(0, 0, yaw)", [
+            ("reference", "reference_quaternion_from_euler(0.0, 0.0, 0.5)"),
+            ("new", "t.quaternion_from_euler(0.0, 0.0, 0.5)"),
+            ("out", "t.quaternion_from_euler(0.0, 0.0, 0.5, out=q)"),
+            ("yaw floats", "t.quaternion_from_yaw(0.5)"),
+            ("yaw out", "t.quaternion_from_yaw(0.5, out=q)"),
+        ]),
+        ("quaternion_from_euler(1, 2, 3, 'ryxz')", [
+            ("reference", "reference_quaternion_from_euler(1.0, 2.0, 3.0, 'ryxz')"),
+            ("new", "t.quaternion_from_euler(1.0, 2.0, 3.0, 'ryxz')"),
+            ("out", "t.quaternion_from_euler(1.0, 2.0, 3.0, 'ryxz', out=q)"),
+        ]),
+        ("quaternion_multiply", [
+            ("reference", "reference_quaternion_multiply(q1, q0)"),
+            ("new", "t.quaternion_multiply(q1, q0)"),
+            ("out", "t.quaternion_multiply(q1, q0, out=q)"),
+        ]),
+        ("quaternion_matrix", [
+            ("reference", "reference_quaternion_matrix(q0)"),
+            ("new", "t.quaternion_matrix(q0)"),
+            ("out", "t.quaternion_matrix(q0, out=m)"),
+        ]),
+    ]
+    for title, variants in cases:
+        print(title)
+        reference = None
+        for label, statement in variants:
+            elapsed = min(timeit.repeat(statement, globals = namespace, number = calls, repeat = 3))
+            per_call = elapsed / calls
+            if reference is None:
+                reference = per_call
+            print("  %-12s %7.3f us/call  %5.2fx" % (label, per_call * 1e6, reference / per_call))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--calls", type = int, default = 100000)
+    args = parser.parse_args()
+
+    check()
+    run(args.calls)
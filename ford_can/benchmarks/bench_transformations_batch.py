@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Compares the *_batch functions of transformations.py on arrays of poses with
+calling their scalar counterparts in a Python loop, as post-processing a
+drive log into a trajectory did.
+
+  ./bench_transformations_batch.py --samples 100000
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "nodes"))
+
+import numpy
+
+import transformations as t
+
+def poses(count, seed = 0):
+    rng = numpy.random.default_rng(seed)
+    angles = rng.uniform(-math.pi, math.pi, (count, 3))
+    quaternions = t.unit_vector(rng.normal(size = (count, 4)), axis = 1)
+    others = t.unit_vector(rng.normal(size = (count, 4)), axis = 1)
+    fractions = rng.random(count)
+    return angles, quaternions, others, fractions
+
+def cases(angles, quaternions, others, fractions):
+    matrices = t.quaternion_matrix_batch(quaternions)
+    return [
+        ("quaternion_from_euler",
+            lambda: [t.quaternion_from_euler(*a) for a in angles],
+            lambda: t.quaternion_from_euler_batch(angles)),
+        ("euler_from_quaternion",
+            lambda: [t.euler_from_quaternion(q) for q in quaternions],
+            lambda: t.euler_from_quaternion_batch(quaternions)),
+        ("quaternion_matrix",
+            lambda: [t.quaternion_matrix(q) for q in quaternions],
+            lambda: t.quaternion_matrix_batch(quaternions)),
+        ("quaternion_from_matrix",
+            lambda: [t.quaternion_from_matrix(m) for m in matrices],
+            lambda: t.quaternion_from_matrix_batch(matrices)),
+        ("quaternion_from_matrix precise",
+            lambda: [t.quaternion_from_matrix(m, True) for m in matrices],
+            lambda: t.quaternion_from_matrix_batch(matrices, True)),
+        ("quaternion_multiply",
+            lambda: [t.quaternion_multiply(a, b) for a, b in zip(quaternions, others)],
+            lambda: t.quaternion_multiply_batch(quaternions, others)),
+        ("quaternion_slerp",
+            lambda: [t.quaternion_slerp(a, b, f) for a, b, f in zip(quaternions, others, fractions)],
+            lambda: t.quaternion_slerp_batch(quaternions, others, fractions)),
+    ]
+
+def timed(function):
+    t0 = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - t0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--samples", type = int, default = 100000)
+    args = parser.parse_args()
+
+    for name, loop, batch in cases(*poses(args.samples)):
+        expected, loop_time = timed(loop)
+        result, batch_time = timed(batch)
+        # quaternions q and -q are the same rotation
+        expected = numpy.array(expected)
+        if name.startswith("quaternion_from_matrix"):
+            expected *= numpy.sign(numpy.sum(expected * result, axis = 1))[:, None]
+        assert numpy.allclose(result, expected), name
+        print("%-32s loop %8.1f ms  batch %7.2f ms  %6.1fx" % (
+            name, loop_time * 1e3, batch_time * 1e3, loop_time / batch_time))
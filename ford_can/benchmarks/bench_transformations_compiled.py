@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Compares the compiled functions of _transformations, built with the package,
+with the Python implementations in transformations.py they replace.
+
+  ./bench_transformations_compiled.py --calls 200000
+"""
+import argparse
+import math
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "nodes"))
+
+import numpy
+
+import transformations as t
+
+FUNCTIONS = ["quaternion_from_euler", "quaternion_multiply", "quaternion_matrix",
+    "euler_from_matrix", "unit_vector", "vector_norm"]
+
+def check():
+    # the compiled functions must agree with the Python ones
+    rng = numpy.random.default_rng(0)
+    q = numpy.empty(4)
+    m = numpy.empty((4, 4))
+    for _ in range(1000):
+        angles = rng.uniform(-math.pi, math.pi, 3)
+        q0, q1 = rng.normal(size = (2, 4))
+        for axes in t._AXES2TUPLE:
+            assert numpy.allclose(t.quaternion_from_euler(*angles, axes = axes),
+                t._py_quaternion_from_euler(*angles, axes = axes))
+            matrix = t.euler_matrix(*angles, axes = axes)
+            assert numpy.allclose(t.euler_from_matrix(matrix, axes),
+                t._py_euler_from_matrix(matrix, axes))
+        assert numpy.allclose(t.quaternion_from_euler(*angles, out = q), t._py_quaternion_from_euler(*angles))
+        assert numpy.allclose(t.quaternion_multiply(q1, q0), t._py_quaternion_multiply(q1, q0))
+        assert numpy.allclose(t.quaternion_multiply(list(q1), q0, out = q), t._py_quaternion_multiply(q1, q0))
+        assert numpy.allclose(t.quaternion_matrix(q0), t._py_quaternion_matrix(q0))
+        assert numpy.allclose(t.quaternion_matrix(q0, out = m), t._py_quaternion_matrix(q0))
+        assert numpy.allclose(t.unit_vector(q0), t._py_unit_vector(q0))
+        assert numpy.allclose(t.vector_norm(q0), t._py_vector_norm(q0))
+    assert numpy.allclose(t.quaternion_matrix([0, 0, 0, 0]), numpy.identity(4))
+    data = rng.normal(size = (5, 4, 3))
+    assert numpy.allclose(t.unit_vector(data, axis = 1), t._py_unit_vector(data, axis = 1))
+    assert numpy.allclose(t.vector_norm(data, axis = -1), t._py_vector_norm(data, axis = -1))
+
+def run(calls):
+    q = numpy.empty(4)
+    m = numpy.empty((4, 4))
+    q0 = t.quaternion_from_euler(0.1, 0.2, 0.3)
+    q1 = t.quaternion_from_euler(-0.3, 0.1, 1.2)
+    matrix = t.quaternion_matrix(q0)
+    namespace = dict(q = q, m = m, q0 = q0, q1 = q1, matrix = matrix, t = t)
+    cases = [
+        ("quaternion_from_euler(1, 2, 3, 'ryxz')", "quaternion_from_euler(1.0, 2.0, 3.0, 'ryxz')"),
+        ("quaternion_from_euler out", "quaternion_from_euler(1.0, 2.0, 3.0, out=q)"),
+        ("quaternion_multiply", "quaternion_multiply(q1, q0)"),
+        ("quaternion_multiply out", "quaternion_multiply(q1, q0, out=q)"),
+        ("quaternion_matrix", "quaternion_matrix(q0)"),
+        ("quaternion_matrix out", "quaternion_matrix(q0, out=m)"),
+        ("euler_from_matrix", "euler_from_matrix(matrix)"),
+        ("unit_vector", "unit_vector(q0)"),
+        ("vector_norm", "vector_norm(q0)"),
+    ]
+    for label, statement in cases:
+        timings = []
+        for prefix in ("t._py_", "t."):
+            elapsed = min(timeit.repeat(prefix + statement, globals = namespace, number = calls, repeat = 3))
+            timings.append(elapsed / calls)
+        print("%-40s python %6.3f us  compiled %6.3f us  %5.1fx" % (
+            label, timings[0] * 1e6, timings[1] * 1e6, timings[0] / timings[1]))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--calls", type = int, default = 100000)
+    args = parser.parse_args()
+
+    if not all(hasattr(t, "_py_" + name) for name in FUNCTIONS):
+        sys.exit("_transformations is not built, build the package first")
+    check()
+    run(args.calls)
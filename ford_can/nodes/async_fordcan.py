@@ -0,0 +1,153 @@
+import asyncio
+import collections
+import functools
+import time
+
+import can
+
+from fordcan import MODULES, FordCAN
+
+Sample = collections.namedtuple("Sample", ["name", "value", "timestamp"])
+
+class AsyncFordCAN(FordCAN):
+    """
+    FordCAN running on an asyncio event loop instead of its threads. Frames
+    are read through a can.Notifier on the loop, which registers the CAN
+    socket as a reader (buses without a file descriptor, like the virtual
+    one, fall back to a reader thread), and polling is a task woken up by
+    responses, so nothing sleeps or hands frames between threads.
+
+      client = AsyncFordCAN(channel = 'can0')
+      client.start()
+      rpm = await client.read('rpm')
+      async for sample in client.stream('speed'):
+          print(sample.value, sample.timestamp)
+
+    Samples are (name, value, timestamp) tuples. Takes the same arguments as
+    FordCAN; only adaptive pacing is supported, and multi-DID requests are
+    kept to 3 DIDs so they fit in one frame, since sending a multi-frame
+    request would block the loop waiting for flow control. stream_size is
+    how many samples a stream buffers for a slow consumer before dropping
+    the oldest.
+    """
+    def __init__(self, *args, stream_size = 100, **kwargs):
+        FordCAN.__init__(self, *args, **kwargs)
+        if self.pacing != 'adaptive':
+            raise ValueError("AsyncFordCAN only supports adaptive pacing")
+        for module in MODULES:
+            self.batch_limit[module] = min(self.batch_limit[module], 3)
+        self.stream_size = stream_size
+        self.loop = None
+        self.notifier = None
+        self.poll_task = None
+
+        # samples go to the queues of the streams and to the futures of the
+        # reads waiting for each signal
+        self.streams = dict((name, []) for name in self.stats)
+        self.waiters = dict((name, []) for name in self.stats)
+        for name in self.stats:
+            setattr(self, "on_" + name, functools.partial(self._deliver, name))
+
+    def start(self):
+        """
+        Starts reading and polling on the running event loop.
+        """
+        self.loop = asyncio.get_event_loop()
+        self.request_stop = False
+        self.response_event = asyncio.Event()
+        self.notifier = can.Notifier(self.bus, [self._on_frame], timeout = self.recv_timeout, loop = self.loop)
+        if self.mode == 'active':
+            self.poll_task = self.loop.create_task(self._poll_loop())
+        self.is_running = True
+
+    def stop(self):
+        self.request_stop = True
+        self.is_running = False
+        if self.notifier is not None:
+            self.notifier.stop()
+            self.notifier = None
+        if self.poll_task is not None:
+            self.poll_task.cancel()
+            self.poll_task = None
+        if self.recorder is not None:
+            self.recorder.close()
+        # end the streams and the pending reads
+        for queues in self.streams.values():
+            for queue in queues:
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+        for futures in self.waiters.values():
+            for future in futures:
+                future.cancel()
+
+    async def stream(self, name):
+        """
+        Yields every sample of a signal from now on, until stop().
+        """
+        if name not in self.streams:
+            raise ValueError("unknown signal: %s" % name)
+        queue = asyncio.Queue(self.stream_size)
+        self.streams[name].append(queue)
+        try:
+            while True:
+                sample = await queue.get()
+                if sample is None:
+                    return
+                yield sample
+        finally:
+            self.streams[name].remove(queue)
+
+    async def read(self, name, timeout = 1.0):
+        """
+        Returns the next sample of a signal. In active mode the signal's query
+        is made due right away instead of waiting for its turn. Raises
+        asyncio.TimeoutError if no value arrives within timeout seconds.
+        """
+        if name not in self.waiters:
+            raise ValueError("unknown signal: %s" % name)
+        future = self.loop.create_future()
+        self.waiters[name].append(future)
+        try:
+            signal = self.decoders.signals.get(name)
+            if self.mode == 'active' and signal is not None:
+                # due right away, the poller sends it as soon as the module
+                # has no other request in flight
+                self.scheduler.make_due(self.poll_names[(signal.module, signal.did)])
+                self.response_event.set()
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            if future in self.waiters[name]:
+                self.waiters[name].remove(future)
+
+    def _deliver(self, name, value, timestamp):
+        sample = Sample(name, value, timestamp)
+        for queue in self.streams[name]:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(sample)
+        waiters = self.waiters[name]
+        if waiters:
+            self.waiters[name] = []
+            for future in waiters:
+                if not future.done():
+                    future.set_result(sample)
+
+    def _on_frame(self, message):
+        if self.recorder is not None:
+            self.recorder.write(message)
+        self._on_message(message)
+
+    def _on_response(self, module):
+        self.outstanding[module] = None
+        self.response_event.set()
+
+    async def _poll_loop(self):
+        while not self.request_stop:
+            self.response_event.clear()
+            wait = self._poll_modules(time.monotonic())
+            if wait > 0.0:
+                try:
+                    await asyncio.wait_for(self.response_event.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
@@ -0,0 +1,221 @@
+"""
+Vectorized decoding of recorded CAN traffic for offline processing.
+
+Frames are given as a structured array of FRAME_DTYPE (one row per frame, in
+the order they were received). Every signal of the FordCAN tables is decoded
+with array operations over all frames at once, with the same scaling as the
+live decoders, and returned as columnar time series:
+
+  series = decode(frames)
+  timestamps, speed = series["speed"]
+"""
+import glob
+import os
+
+import numpy
+
+import fordcan
+from decoders import DID_LENGTH, BroadcastSignal, DecoderRegistry, Signal
+
+# 24 bytes per frame, aligned so a file of raw records maps directly onto it
+FRAME_DTYPE = numpy.dtype([
+    ("timestamp", "<f8"),
+    ("arbitration_id", "<u4"),
+    ("dlc", "u1"),
+    ("data", "u1", (8,)),
+], align = True)
+
+def frames_from_messages(messages):
+    """
+    Builds a FRAME_DTYPE array from can.Message objects, e.g. from a
+    can.LogReader over a candump, asc or blf file.
+    """
+    messages = list(messages)
+    frames = numpy.zeros(len(messages), dtype = FRAME_DTYPE)
+    for i, message in enumerate(messages):
+        frames[i]["timestamp"] = message.timestamp
+        frames[i]["arbitration_id"] = message.arbitration_id
+        frames[i]["dlc"] = message.dlc
+        frames[i]["data"][:len(message.data)] = bytearray(message.data)
+    return frames
+
+def load(path):
+    """
+    Loads frames written by recorder.FrameRecorder from one segment file, or
+    from every segment in a directory in recording order. A single segment is
+    memory mapped rather than read. Zeroed records at the end of a segment
+    that was not closed cleanly are dropped.
+    """
+    if os.path.isdir(path):
+        paths = sorted(glob.glob(os.path.join(path, "*.bin")))
+        if not paths:
+            return numpy.zeros(0, dtype = FRAME_DTYPE)
+        return numpy.concatenate([load(p) for p in paths])
+    if os.path.getsize(path) == 0:
+        return numpy.zeros(0, dtype = FRAME_DTYPE)
+    frames = numpy.memmap(path, dtype = FRAME_DTYPE, mode = "r")
+    recorded = numpy.nonzero(frames["timestamp"] != 0.0)[0]
+    return frames[:recorded[-1] + 1 if len(recorded) else 0]
+
+def _gather(rows, index):
+    # rows[i, index[i]] with out of range indices reading 0
+    width = rows.shape[1]
+    valid = index < width
+    values = rows[numpy.arange(len(rows)), numpy.minimum(index, width - 1)]
+    return numpy.where(valid, values, 0)
+
+def _field_values(field, rows, base):
+    """
+    Decodes one field from every row, reading at base + field.first_byte where
+    base is an int or an array with one entry per row.
+    """
+    raw = numpy.zeros(len(rows), dtype = numpy.int64)
+    for i in range(field.nbytes):
+        if numpy.ndim(base) == 0:
+            byte = rows[:, base + field.first_byte + i].astype(numpy.int64)
+        else:
+            byte = _gather(rows, base + field.first_byte + i).astype(numpy.int64)
+        if field.little_endian:
+            raw |= byte << (8 * i)
+        else:
+            raw = (raw << 8) | byte
+    raw = (raw >> field.shift) & field.mask
+    if field.signed:
+        raw -= ((raw >> (field.bits - 1)) & 1) << field.bits
+    if field.scale is None:
+        return raw
+    return raw * field.scale + field.offset
+
+def _signal_values(signal, rows, base):
+    if len(signal.fields) == 1:
+        return _field_values(signal.fields[0], rows, base)
+    return numpy.stack([_field_values(field, rows, base) for field in signal.fields], axis = 1)
+
+def _payloads(data, timestamps):
+    """
+    Reassembles the ISO-TP messages of one response id. Returns a matrix with
+    one payload per row (starting with the service id), in the order the
+    messages started, the payload lengths and the time of the frame each
+    payload started in, as the live path does. Consecutive frames are
+    expected right after their first frame, as a module answers one request
+    at a time; messages with a missing or out of sequence frame are dropped.
+    """
+    pci = data[:, 0] >> 4
+    single = numpy.nonzero((pci == 0) & ((data[:, 0] & 0x0f) > 0))[0]
+    first = numpy.nonzero(pci == 1)[0]
+    first_length = ((data[first, 0].astype(numpy.int64) & 0x0f) << 8) | data[first, 1]
+
+    width = max(7, int(first_length.max()) if len(first) else 0)
+    payloads = numpy.zeros((len(single) + len(first), width), dtype = numpy.uint8)
+    lengths = numpy.zeros(len(payloads), dtype = numpy.int64)
+    times = numpy.zeros(len(payloads), dtype = numpy.float64)
+    valid = numpy.ones(len(payloads), dtype = bool)
+
+    payloads[:len(single), :7] = data[single, 1:8]
+    lengths[:len(single)] = data[single, 0] & 0x0f
+    times[:len(single)] = timestamps[single]
+
+    multi = payloads[len(single):]
+    multi_valid = valid[len(single):]
+    multi_times = times[len(single):]
+    multi[:, :6] = data[first, 2:8]
+    lengths[len(single):] = first_length
+    multi_times[:] = timestamps[first]
+    multi_valid &= first_length >= 8
+
+    consecutive = (first_length - 6 + 6) // 7
+    for k in range(1, int(consecutive.max()) + 1 if len(first) else 1):
+        needed = consecutive >= k
+        row = first + k
+        present = needed & (row < len(data))
+        row = numpy.where(present, row, 0)
+        in_sequence = data[row, 0] == (0x20 | (k & 0x0f))
+        multi_valid &= ~needed | (present & in_sequence)
+        take = present & in_sequence
+        column = 6 + 7 * (k - 1)
+        n = min(7, width - column)
+        multi[take, column:column + n] = data[row[take], 1:1 + n]
+
+    # back in frame order, single frame payloads were put first
+    order = numpy.argsort(numpy.concatenate([single, first]), kind = "stable")
+    order = order[valid[order]]
+    return payloads[order], lengths[order], times[order]
+
+def _decode_records(table, payloads, lengths, times, series):
+    # table: {(service, did): (signals, record_length)} for one response id
+    for service, did_length in DID_LENGTH.items():
+        rows = payloads[:, 0] == service
+        if not rows.any():
+            continue
+        block = payloads[rows]
+        block_lengths = lengths[rows]
+        block_times = times[rows]
+        position = numpy.ones(len(block), dtype = numpy.int64)
+        active = numpy.ones(len(block), dtype = bool)
+        entries = [(did, entry) for (s, did), entry in table.items() if s == service]
+        while active.any():
+            if did_length == 2:
+                did = (_gather(block, position).astype(numpy.int64) << 8) | _gather(block, position + 1)
+            else:
+                did = _gather(block, position).astype(numpy.int64)
+            matched = numpy.zeros(len(block), dtype = bool)
+            next_position = position.copy()
+            for key, (signals, record_length) in entries:
+                match = active & (did == key) & (position + did_length + record_length <= block_lengths)
+                if not match.any():
+                    continue
+                base = position[match] + did_length
+                for signal in signals:
+                    series.setdefault(signal.name, []).append(
+                        (block_times[match], _signal_values(signal, block[match], base)))
+                next_position[match] = position[match] + did_length + record_length
+                matched |= match
+            # only ReadDataByIdentifier responses carry more than one record
+            active = matched if service == 0x62 else numpy.zeros(len(block), dtype = bool)
+            position = next_position
+
+def decode(frames, signal_table = None, broadcast_table = None):
+    """
+    Decodes every known signal in a FRAME_DTYPE array. The tables default to
+    fordcan.SIGNALS and fordcan.BROADCAST_SIGNALS. Returns
+    {name: (timestamps, values)} sorted by time; values has one column per
+    field for multi-value signals such as gps.
+    """
+    if signal_table is None:
+        signal_table = fordcan.SIGNALS
+    if broadcast_table is None:
+        broadcast_table = fordcan.BROADCAST_SIGNALS
+
+    registry = DecoderRegistry(Signal.from_dict(definition) for definition in signal_table)
+    tables = {}
+    for (response_id, service, did), entry in registry.table.items():
+        tables.setdefault(response_id, {})[(service, did)] = entry
+    broadcast = {}
+    for definition in broadcast_table:
+        signal = BroadcastSignal.from_dict(definition)
+        broadcast.setdefault(signal.arbitration_id, []).append(signal)
+
+    ids = frames["arbitration_id"]
+    series = {}
+    for response_id, table in tables.items():
+        selected = ids == response_id
+        if not selected.any():
+            continue
+        payloads, lengths, times = _payloads(frames["data"][selected], frames["timestamp"][selected])
+        _decode_records(table, payloads, lengths, times, series)
+    for arbitration_id, signals in broadcast.items():
+        selected = ids == arbitration_id
+        if not selected.any():
+            continue
+        data = frames["data"][selected]
+        for signal in signals:
+            series.setdefault(signal.name, []).append(
+                (frames["timestamp"][selected], _signal_values(signal, data, 0)))
+
+    result = {}
+    for name, chunks in series.items():
+        timestamps = numpy.concatenate([chunk[0] for chunk in chunks])
+        values = numpy.concatenate([chunk[1] for chunk in chunks])
+        order = numpy.argsort(timestamps, kind = "stable")
+        result[name] = (timestamps[order], values[order])
+    return result
@@ -0,0 +1,69 @@
+import re
+
+_MESSAGE = re.compile(r'^BO_\s+(\d+)\s+(\w+)\s*:\s*(\d+)\s+(\w+)')
+_SIGNAL = re.compile(r'^SG_\s+(\w+)\s*(M|m\d+)?\s*:\s*(\d+)\|(\d+)@([01])([+-])\s*'
+    r'\(\s*([^,\s]+)\s*,\s*([^)\s]+)\s*\)')
+
+# service id and DID in front of the data record of a ReadDataByIdentifier
+# response
+_RESPONSE_HEADER_BITS = 24
+
+def _field(start, bits, byte_order, sign, factor, offset):
+    field = {
+        "start": start,
+        "bits": bits,
+        "little_endian": byte_order == "1",
+        "signed": sign == "-",
+    }
+    # (1,0) keeps the raw integer, e.g. for enumerations
+    if not (factor == "1" and offset == "0"):
+        field["scale"] = float(factor)
+        field["offset"] = float(offset)
+    return field
+
+def load(path, response_ids = ()):
+    """
+    Reads signal definitions from a DBC file and returns them as table entries
+    (diagnostic signals, broadcast signals) in the form FordCAN takes.
+
+    Messages whose id is one of response_ids describe ReadDataByIdentifier
+    responses, with the ISO-TP framing stripped: the frame is the response
+    payload, the multiplexor signal (M) holds the DID in bytes 1-2 and every
+    multiplexed signal (m<DID>) is a value in that DID's record, with start
+    bits counted from the service id byte. All other messages are broadcast
+    frames decoded as they are.
+    """
+    response_ids = set(response_ids)
+    signals = []
+    broadcast = []
+    arbitration_id = None
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            match = _MESSAGE.match(line)
+            if match:
+                # bit 31 flags extended ids
+                arbitration_id = int(match.group(1)) & 0x1fffffff
+                continue
+            match = _SIGNAL.match(line)
+            if not match or arbitration_id is None:
+                continue
+            name, multiplex, start, bits, byte_order, sign, factor, offset = match.groups()
+            start = int(start)
+            bits = int(bits)
+            if arbitration_id in response_ids:
+                if multiplex is None or multiplex == "M":
+                    continue
+                entry = _field(start - _RESPONSE_HEADER_BITS, bits, byte_order, sign, factor, offset)
+                entry.update({
+                    "name": name,
+                    "module": arbitration_id - 8,
+                    "service": 0x22,
+                    "did": int(multiplex[1:]),
+                })
+                signals.append(entry)
+            else:
+                entry = _field(start, bits, byte_order, sign, factor, offset)
+                entry.update({"name": name, "id": arbitration_id})
+                broadcast.append(entry)
+    return signals, broadcast
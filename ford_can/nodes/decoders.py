@@ -0,0 +1,269 @@
+import struct
+
+import can
+
+# positive response service id for each request service id
+RESPONSE_SERVICE = {
+    0x01: 0x41, # OBD-II show current data
+    0x22: 0x62, # UDS ReadDataByIdentifier
+}
+
+# number of identifier bytes following the service id
+DID_LENGTH = {
+    0x41: 1,
+    0x62: 2,
+}
+
+_STRUCT_CODES = {1: "b", 2: "h", 4: "i", 8: "q"}
+
+class BitField(object):
+    """
+    One value inside a record, described the way a DBC file does: start bit,
+    bit length, byte order (Motorola/big endian unless little_endian, with the
+    start bit being the most significant one) and signedness.
+    value = raw * scale + offset, or the raw integer if no scale is given.
+
+    The definition is compiled once into the bytes it covers plus a shift and
+    mask, and into a struct.Struct when the value is byte aligned, so decoding
+    never re-reads the definition. The same first_byte/nbytes/shift/mask
+    attributes let array code decode whole columns at once.
+    """
+    def __init__(self, start, bits, little_endian = False, signed = False, scale = None, offset = 0.0):
+        self.start = start
+        self.bits = bits
+        self.little_endian = little_endian
+        self.signed = signed
+        self.scale = scale
+        self.offset = offset
+
+        if little_endian:
+            first_bit = start
+            last_bit = start + bits - 1
+            self.first_byte = first_bit // 8
+            self.nbytes = last_bit // 8 - self.first_byte + 1
+            self.shift = first_bit % 8
+        else:
+            # bit 7 of byte 0 is the first bit on the wire
+            msb = (start // 8) * 8 + 7 - start % 8
+            lsb = msb + bits - 1
+            self.first_byte = msb // 8
+            self.nbytes = lsb // 8 - self.first_byte + 1
+            self.shift = 7 - lsb % 8
+        self.byteorder = "little" if little_endian else "big"
+        self.mask = (1 << bits) - 1
+
+        self.unpacker = None
+        if self.shift == 0 and bits == self.nbytes * 8 and self.nbytes in _STRUCT_CODES:
+            code = _STRUCT_CODES[self.nbytes]
+            self.unpacker = struct.Struct(("<" if little_endian else ">") + (code if signed else code.upper()))
+
+    # byte span covered, used to size records
+    @property
+    def position(self):
+        return self.first_byte
+
+    @property
+    def length(self):
+        return self.nbytes
+
+    def raw(self, buf, base):
+        start = base + self.first_byte
+        if self.unpacker is not None:
+            return self.unpacker.unpack_from(buf, start)[0]
+        raw = (int.from_bytes(buf[start:start + self.nbytes], self.byteorder) >> self.shift) & self.mask
+        if self.signed and raw >> (self.bits - 1):
+            raw -= 1 << self.bits
+        return raw
+
+    def decode(self, buf, base):
+        raw = self.raw(buf, base)
+        if self.scale is None:
+            return raw
+        return raw * self.scale + self.offset
+
+    def encode(self, value, buf, base):
+        """
+        Writes value into buf (a bytearray) at base, the inverse of decode;
+        values out of range are clamped.
+        """
+        if self.scale is None:
+            raw = int(value)
+        else:
+            raw = int(round((value - self.offset) / self.scale))
+        if self.signed:
+            raw = min(max(raw, -(1 << (self.bits - 1))), (1 << (self.bits - 1)) - 1)
+        else:
+            raw = min(max(raw, 0), self.mask)
+        start = base + self.first_byte
+        word = int.from_bytes(buf[start:start + self.nbytes], self.byteorder)
+        word &= ~(self.mask << self.shift)
+        word |= (raw & self.mask) << self.shift
+        buf[start:start + self.nbytes] = word.to_bytes(self.nbytes, self.byteorder)
+
+class Field(BitField):
+    """
+    A whole-byte big endian value: length bytes starting at byte position.
+    """
+    def __init__(self, position, length, signed = False, scale = None, offset = 0.0):
+        BitField.__init__(self, position * 8 + 7, length * 8, False, signed, scale, offset)
+
+def _field_from_dict(definition):
+    # byte level entries give position/length, bit level ones start/bits
+    if "start" in definition:
+        keys = ("start", "bits", "little_endian", "signed", "scale", "offset")
+        return BitField(**dict((k, definition[k]) for k in keys if k in definition))
+    keys = ("position", "length", "signed", "scale", "offset")
+    return Field(**dict((k, definition[k]) for k in keys if k in definition))
+
+def _fields_from_dict(definition):
+    if "fields" in definition:
+        return [_field_from_dict(f) for f in definition["fields"]]
+    return [_field_from_dict(definition)]
+
+class Signal(object):
+    """
+    A signal read from a module by service and DID. A signal with a single
+    field is delivered as a plain value, one with several fields as a tuple.
+    """
+    def __init__(self, name, module, service, did, fields, rate = None, record_length = None):
+        self.name = name
+        self.callback = "on_" + name
+        self.module = module
+        self.response_id = module + 8
+        self.service = service
+        self.response_service = RESPONSE_SERVICE[service]
+        self.did = did
+        self.fields = fields
+        self.rate = rate
+        # bytes taken by the data record in a response, needed to find the next
+        # DID when several are read at once
+        if record_length is None:
+            record_length = max(f.position + f.length for f in fields)
+        self.record_length = record_length
+
+    @classmethod
+    def from_dict(cls, definition):
+        """
+        Builds a signal from a table entry such as
+
+          {"name": "speed", "module": 0x7e0, "service": 0x22, "did": 0x1505,
+           "position": 0, "length": 2, "scale": 1 / 128.0}
+
+        Bit level values are given with "start", "bits" and optionally
+        "little_endian" as in a DBC file instead of "position" and "length".
+        Multi-value signals list their values under "fields". If the values
+        don't reach the end of the record, give its size in "record_length".
+        """
+        fields = _fields_from_dict(definition)
+        return cls(definition["name"], definition["module"], definition.get("service", 0x22),
+            definition["did"], fields, definition.get("rate"), definition.get("record_length"))
+
+    def decode(self, buf, base):
+        if len(self.fields) == 1:
+            return self.fields[0].decode(buf, base)
+        return tuple(field.decode(buf, base) for field in self.fields)
+
+    def encode(self, value, buf, base):
+        if len(self.fields) == 1:
+            self.fields[0].encode(value, buf, base)
+            return
+        for field, v in zip(self.fields, value):
+            field.encode(v, buf, base)
+
+    def query(self):
+        did_length = DID_LENGTH[self.response_service]
+        data = [did_length + 1, self.service] + list(self.did.to_bytes(did_length, "big"))
+        data += [0x55] * (8 - len(data))
+        return can.Message(arbitration_id = self.module, data = data, extended_id = False)
+
+class BroadcastSignal(object):
+    """
+    A signal that a module broadcasts periodically in its own frame, decoded
+    straight from the frame data; positions count from the first data byte.
+    """
+    def __init__(self, name, arbitration_id, fields):
+        self.name = name
+        self.callback = "on_" + name
+        self.arbitration_id = arbitration_id
+        self.fields = fields
+
+    @classmethod
+    def from_dict(cls, definition):
+        """
+        Builds a signal from a table entry such as
+
+          {"name": "rpm", "id": 0x201, "position": 0, "length": 2, "scale": 0.25}
+        """
+        return cls(definition["name"], definition["id"], _fields_from_dict(definition))
+
+    def decode(self, buf, base = 0):
+        if len(self.fields) == 1:
+            return self.fields[0].decode(buf, base)
+        return tuple(field.decode(buf, base) for field in self.fields)
+
+class DecoderRegistry(object):
+    """
+    Maps (response arbitration id, response service id, DID) to the signals
+    carried in that response.
+    """
+    def __init__(self, signals = ()):
+        self.signals = {}
+        self.table = {}
+        for signal in signals:
+            self.add(signal)
+
+    def add(self, signal):
+        self.signals[signal.name] = signal
+        key = (signal.response_id, signal.response_service, signal.did)
+        signals, record_length = self.table.get(key, ([], 0))
+        self.table[key] = (signals + [signal], max(record_length, signal.record_length))
+
+    def lookup(self, arbitration_id, buf, start):
+        """
+        Returns (signals, base) for the response payload starting with the
+        service id at buf[start], base being the index of the data record, or
+        (None, 0) for unknown responses.
+        """
+        service = buf[start]
+        did_length = DID_LENGTH.get(service)
+        if did_length == 2:
+            did = (buf[start + 1] << 8) | buf[start + 2]
+        elif did_length == 1:
+            did = buf[start + 1]
+        else:
+            return None, 0
+        entry = self.table.get((arbitration_id, service, did))
+        if entry is None:
+            return None, 0
+        return entry[0], start + 1 + did_length
+
+    def records(self, arbitration_id, buf, start, length):
+        """
+        Yields (signals, base) for every data record in a response payload of
+        the given length. A ReadDataByIdentifier response to a request for
+        several DIDs carries them one after the other behind a single service
+        id; walking stops at the first DID that isn't known, since its record
+        length (and so where the next one starts) is unknown.
+        """
+        service = buf[start]
+        did_length = DID_LENGTH.get(service)
+        if did_length is None:
+            return
+        end = start + length
+        position = start + 1
+        while position + did_length <= end:
+            if did_length == 2:
+                did = (buf[position] << 8) | buf[position + 1]
+            else:
+                did = buf[position]
+            entry = self.table.get((arbitration_id, service, did))
+            if entry is None:
+                return
+            signals, record_length = entry
+            base = position + did_length
+            if base + record_length > end:
+                return
+            yield signals, base
+            if service != 0x62:
+                return
+            position = base + record_length
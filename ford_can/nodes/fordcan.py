@@ -1,7 +1,15 @@
 import can
+import functools
 import time
 import threading
 
+import dbc
+from decoders import BroadcastSignal, DecoderRegistry, Signal
+from isotp import IsoTpChannel
+from recorder import FrameRecorder
+from scheduler import PollScheduler
+from stats import SignalStats
+
 ECU_QUERY = 0x7e0 # ecu
 ECU_RESPONSE = ECU_QUERY + 8
 ABS_QUERY = 0x760 # anti-lock brake system
@@ -10,68 +18,228 @@ BC_QUERY = 0x726 # body control
 BC_RESPONSE = BC_QUERY + 8
 API_QUERY = 0x7d0 # accesory protocol interface
 API_RESPONSE = API_QUERY + 8
-SAS_QUERY = 0x797 # steering angle sensor
-SAS_RESPONSE = API_QUERY + 8
 
-msg_query_rpm = can.Message(arbitration_id = ECU_QUERY,
-            data=[0x02, 0x01, 0x0c, 0x55, 0x55, 0x55, 0x55, 0x55,],
-            extended_id=False)
+# position is the byte offset of the value within the data record that follows
+# the service id and DID in the response; value = raw * scale + offset
+SIGNALS = [
+    {"name": "rpm", "module": ECU_QUERY, "service": 0x01, "did": 0x0c,
+        "position": 0, "length": 2, "scale": 1 / 4.0},
+    {"name": "speed", "module": ECU_QUERY, "did": 0x1505,
+        "position": 0, "length": 2, "scale": 1 / 128.0},
+    {"name": "total_distance", "module": ECU_QUERY, "did": 0xdd01,
+        "position": 0, "length": 3, "scale": 1.0},
+    {"name": "accelerator_fraction", "module": ECU_QUERY, "did": 0x032b,
+        "position": 0, "length": 1, "scale": 1 / 255.0},
+    {"name": "steering_wheel_angle", "module": ABS_QUERY, "did": 0x3302,
+        "position": 0, "length": 2, "scale": 0.1, "offset": -780.0},
+    {"name": "brake_pressure", "module": ABS_QUERY, "did": 0x2034,
+        "position": 0, "length": 2, "signed": True, "scale": 30.0},
+    {"name": "ignition_switch", "module": BC_QUERY, "did": 0x411f,
+        "position": 0, "length": 1},
+    # gps and heading come in the same multi-frame response
+    {"name": "gps", "module": API_QUERY, "did": 0x8012, "fields": [
+        {"position": 4, "length": 2, "signed": True, "scale": 1 / 60.0},
+        {"position": 8, "length": 2, "signed": True, "scale": 1 / 60.0}]},
+    {"name": "heading", "module": API_QUERY, "did": 0x8012,
+        "position": 13, "length": 2, "scale": 1.0},
+]
 
-msg_query_speed = can.Message(arbitration_id = ECU_QUERY,
-            data=[0x03, 0x22, 0x15, 0x05, 0x55, 0x55, 0x55, 0x55,],
-            extended_id=False)
+# signals the modules broadcast on HS-CAN by themselves, read in passive mode.
+# position is the byte offset in the frame data. These come from community
+# reverse engineering of the powertrain frame on Mazda-derived Ford platforms
+# and are not verified on every model; more can be given to FordCAN through
+# broadcast_signals.
+BROADCAST_SIGNALS = [
+    {"name": "rpm", "id": 0x201, "position": 0, "length": 2, "scale": 1 / 4.0},
+    {"name": "speed", "id": 0x201, "position": 4, "length": 2, "scale": 0.01, "offset": -100.0},
+    {"name": "accelerator_fraction", "id": 0x201, "position": 6, "length": 1, "scale": 1 / 200.0},
+]
 
-msg_query_brake_pressure = can.Message(arbitration_id = ABS_QUERY,
-            data=[0x03, 0x22, 0x20, 0x34, 0x55, 0x55, 0x55, 0x55,],
-            extended_id=False)
+# default polling rates in Hz, other signals are polled at 10 Hz unless their
+# table entry gives a rate. A signal sharing its DID with one listed before it
+# (like heading with gps) is not polled on its own.
+DEFAULT_RATES = {
+    "steering_wheel_angle": 80.0,
+    "speed": 20.0,
+    "brake_pressure": 20.0,
+    "rpm": 10.0,
+    "accelerator_fraction": 10.0,
+    "ignition_switch": 10.0,
+    "total_distance": 10.0,
+    "gps": 5.0,
+}
 
-msg_query_accelerator_fraction = can.Message(arbitration_id = ECU_QUERY,
-            data=[0x03, 0x22, 0x03, 0x2b, 0x55, 0x55, 0x55, 0x55,],
-            extended_id=False)
+# modules that are polled, each answers on its query id + 8
+MODULES = (ECU_QUERY, ABS_QUERY, BC_QUERY, API_QUERY)
 
-msg_query_steering_angle = can.Message(arbitration_id = ABS_QUERY,
-              data=[0x03, 0x22, 0x33, 0x02, 0x55, 0x55, 0x55, 0x55,],
-              extended_id=False)
+def _merge_table(table, entries):
+    # entries replace the ones with the same name, new ones are appended
+    merged = list(table)
+    names = [definition["name"] for definition in merged]
+    for definition in entries:
+        if definition["name"] in names:
+            merged[names.index(definition["name"])] = definition
+        else:
+            merged.append(definition)
+            names.append(definition["name"])
+    return merged
 
-msg_query_ignition_switch = can.Message(arbitration_id = BC_QUERY,
-              data=[0x03, 0x22, 0x41, 0x1f, 0x55, 0x55, 0x55, 0x55,],
-              extended_id=False)
+def load_tables(signals = None, broadcast_signals = None, dbc_file = None):
+    """
+    Returns the (diagnostic, broadcast) signal tables FordCAN uses: the
+    built-in ones, entries from a DBC file and then the ones given directly,
+    later ones replacing earlier ones by name.
+    """
+    signal_table = SIGNALS
+    broadcast_table = BROADCAST_SIGNALS
+    if dbc_file:
+        dbc_signals, dbc_broadcast = dbc.load(dbc_file, [module + 8 for module in MODULES])
+        signal_table = _merge_table(signal_table, dbc_signals)
+        broadcast_table = _merge_table(broadcast_table, dbc_broadcast)
+    signal_table = _merge_table(signal_table, signals or ())
+    broadcast_table = _merge_table(broadcast_table, broadcast_signals or ())
+    return signal_table, broadcast_table
 
-msg_query_total_distance = can.Message(arbitration_id = ECU_QUERY,
-              data=[0x03, 0x22, 0xdd, 0x01, 0x55, 0x55, 0x55, 0x55,],
-              extended_id=False)
+class FordCAN(object):
+    def __init__(self, channel = 'can0', bustype = 'socketcan_native', rates = None,
+            pacing = 'adaptive', send_interval = 0.002, response_timeout = 0.05,
+            signals = None, block_size = 0, st_min = 0, max_batch = 3, batch_horizon = 0.01,
+            mode = 'active', broadcast_signals = None, dbc_file = None,
+            record_dir = None, record_segment_frames = 1 << 20, record_max_segments = 0,
+            bus = None):
+        signal_table, broadcast_table = load_tables(signals, broadcast_signals, dbc_file)
 
-msg_query_gps = can.Message(arbitration_id = API_QUERY,
-              data=[0x03, 0x22, 0x80, 0x12, 0x55, 0x55, 0x55, 0x55,],
-              extended_id=False)
+        # active mode polls the modules with diagnostic requests, passive mode
+        # sends nothing and decodes the frames the modules broadcast anyway
+        if mode not in ('active', 'passive'):
+            raise ValueError("mode must be 'active' or 'passive', got %s" % mode)
+        self.mode = mode
 
-msg_query_gps_flow = can.Message(arbitration_id = API_QUERY,
-            data=[0x30, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,],
-            extended_id=False)
+        self.broadcast = {}
+        for definition in broadcast_table:
+            signal = BroadcastSignal.from_dict(definition)
+            self.broadcast.setdefault(signal.arbitration_id, []).append(signal)
 
-class FordCAN(object):
-    def __init__(self, channel = 'can0', bustype = 'socketcan_native'):
-        self.bus = can.interface.Bus(channel=channel, bustype=bustype, can_filters = [
-          {"can_id": ECU_RESPONSE, "can_mask": 0x7F, "extended": False},    
-          {"can_id": ABS_RESPONSE, "can_mask": 0x7F, "extended": False},    
-          {"can_id": BC_RESPONSE, "can_mask": 0x7F, "extended": False},    
-          {"can_id": API_RESPONSE, "can_mask": 0x7F, "extended": False},    
-        ])
+        # exact match filters for the ids we have signals for, so the kernel
+        # drops every other frame before it wakes up the input thread: the
+        # broadcast frames in passive mode, the responses of the modules that
+        # are polled in active mode
+        if mode == 'passive':
+            self.receive_ids = sorted(self.broadcast)
+        else:
+            self.receive_ids = sorted(set(definition["module"] + 8 for definition in signal_table))
+        can_filters = [{"can_id": arbitration_id, "can_mask": 0x7FF, "extended": False}
+            for arbitration_id in self.receive_ids]
+        # an already open bus (e.g. a replay.ReplayBus) replaces channel/bustype
+        if bus is None:
+            self.bus = can.interface.Bus(channel=channel, bustype=bustype, can_filters = can_filters)
+        else:
+            self.bus = bus
+            self.bus.set_filters(can_filters)
         self.request_stop = False
         self.is_running = False
 
-        self.frame_api = 0
+        if pacing not in ('adaptive', 'fixed'):
+            raise ValueError("pacing must be 'adaptive' or 'fixed', got %s" % pacing)
+        self.pacing = pacing
+
+        # fixed pacing: gap after every frame sent on the bus
+        self.send_interval = send_interval
+
+        # adaptive pacing: each module has at most one request in flight, the
+        # next one goes out as soon as the response arrives or this expires
+        self.response_timeout = response_timeout
+        self.outstanding = dict((module, None) for module in MODULES)
+        self.response_event = threading.Event()
+
+        self.recv_timeout = 0.1
+
+        # every received frame is appended to segment files in record_dir
+        self.recorder = None
+        if record_dir:
+            self.recorder = FrameRecorder(record_dir, record_segment_frames, record_max_segments)
+
+        # ReadDataByIdentifier queries to the same module that are due within
+        # batch_horizon seconds are sent as one request for up to max_batch
+        # DIDs. A module that rejects such a request gets single-DID requests
+        # from then on.
+        self.batch_horizon = batch_horizon
+        self.batch_limit = dict((module, max_batch) for module in MODULES)
+        self.last_batch = dict((module, 1) for module in MODULES)
+
+        # ISO-TP transport per module, keyed by response id. block_size and
+        # st_min are what we ask the modules to use for multi-frame responses
+        self.channels = dict((module + 8, IsoTpChannel(self.bus, module, module + 8,
+            self._process_payload, block_size = block_size, st_min = st_min)) for module in MODULES)
+
+        self.decoders = DecoderRegistry()
+        poll_rates = {}
+        # (module, did) -> name of the signal whose query reads it, and
+        # that name -> all the signals the query reads
+        self.poll_names = {}
+        self.polled_signals = {}
+        for definition in signal_table:
+            signal = Signal.from_dict(definition)
+            if signal.module not in MODULES:
+                raise ValueError("signal %s queries unknown module 0x%x" % (signal.name, signal.module))
+            self.decoders.add(signal)
+            if (signal.module, signal.did) not in self.poll_names:
+                self.poll_names[(signal.module, signal.did)] = signal.name
+                self.polled_signals[signal.name] = []
+                rate = signal.rate
+                if rate is None:
+                    rate = DEFAULT_RATES.get(signal.name, 10.0)
+                poll_rates[signal.name] = rate
+            self.polled_signals[self.poll_names[(signal.module, signal.did)]].append(signal.name)
+            if not hasattr(self, signal.callback):
+                setattr(self, signal.callback, lambda x, t: 0)
 
-        # callbacks to be overriden
-        self.on_steering_wheel_angle = lambda x: 0
-        self.on_accelerator_fraction = lambda x: 0
-        self.on_brake_pressure = lambda x: 0
-        self.on_rpm = lambda x: 0
-        self.on_speed = lambda x: 0
-        self.on_total_distance = lambda x: 0
-        self.on_ignition_switch = lambda x: 0
-        self.on_gps = lambda x: 0
-        self.on_heading = lambda x: 0
+        self.scheduler = PollScheduler()
+        if rates:
+            for name in rates:
+                if name not in poll_rates:
+                    raise ValueError("unknown signal: %s" % name)
+            poll_rates.update(rates)
+        for name, rate in poll_rates.items():
+            signal = self.decoders.signals[name]
+            self.scheduler.add(name, signal.query(), rate, lane = signal.module)
+
+        for signals in self.broadcast.values():
+            for signal in signals:
+                if not hasattr(self, signal.callback):
+                    setattr(self, signal.callback, lambda x, t: 0)
+
+        # handler(data, timestamp) for each id that is received
+        self.handlers = {}
+        for arbitration_id in self.receive_ids:
+            if mode == 'passive':
+                self.handlers[arbitration_id] = functools.partial(self._on_broadcast,
+                    self.broadcast[arbitration_id])
+            else:
+                self.handlers[arbitration_id] = self.channels[arbitration_id].feed
+
+        # per signal counters, read with get_stats()
+        self.stats = dict((name, SignalStats()) for name in self.decoders.signals)
+        for signals in self.broadcast.values():
+            for signal in signals:
+                self.stats.setdefault(signal.name, SignalStats())
+        # names polled by the request in flight to each module
+        self.in_flight = dict((module, ()) for module in MODULES)
+        # in fixed pacing, polled names sent and not answered since; set by
+        # the output thread and cleared by the input thread
+        self.unanswered = dict((name, False) for name in self.polled_signals)
+
+        # callbacks to be overriden, called with the value and the receive
+        # timestamp of the frame it came in (kernel time with socketcan)
+        self.on_steering_wheel_angle = lambda x, t: 0
+        self.on_accelerator_fraction = lambda x, t: 0
+        self.on_brake_pressure = lambda x, t: 0
+        self.on_rpm = lambda x, t: 0
+        self.on_speed = lambda x, t: 0
+        self.on_total_distance = lambda x, t: 0
+        self.on_ignition_switch = lambda x, t: 0
+        self.on_gps = lambda x, t: 0
+        self.on_heading = lambda x, t: 0
 
     def start(self):
         self.request_stop = False
@@ -79,9 +247,10 @@ class FordCAN(object):
         self.thread_input = threading.Thread(target = self._input_loop)
         self.thread_input.daemon = True
         self.thread_input.start()
-        self.thread_output = threading.Thread(target = self._output_loop)
-        self.thread_output.daemon = True
-        self.thread_output.start()
+        if self.mode == 'active':
+            self.thread_output = threading.Thread(target = self._output_loop)
+            self.thread_output.daemon = True
+            self.thread_output.start()
         self.thread_monitor = threading.Thread(target = self._monitor_loop)
         self.thread_monitor.daemon = True
         self.thread_monitor.start()
@@ -92,103 +261,204 @@ class FordCAN(object):
         self.request_stop = True
         self.is_running = False
 
+    def get_poll_rates(self):
+        # {signal: (requested_hz, achieved_hz)}
+        return self.scheduler.rates()
+
+    def scale_poll_rates(self, factor):
+        """
+        Multiplies every poll rate by factor, e.g. the speed of a replay. With
+        an infinite factor every query is due again as soon as it was sent, so
+        each module gets the next one as soon as it answered.
+        """
+        for name, entry in self.scheduler.entries.items():
+            self.scheduler.set_rate(name, entry["rate"] * factor)
+
+    def get_stats(self):
+        """
+        Returns {signal: summary} with the counters and latency/interval
+        percentiles of every signal, see stats.SignalStats.summary.
+        """
+        now = time.monotonic()
+        return dict((name, stats.summary(now)) for name, stats in self.stats.items())
+
     def _output_loop(self):
-        i = 0
+        if self.pacing == 'adaptive':
+            self._output_loop_adaptive()
+        else:
+            self._output_loop_fixed()
+
+    def _output_loop_fixed(self):
         while not self.request_stop:
-            time.sleep(0.005)
-            i += 1
+            now = time.monotonic()
+            due = self._pop_request(now)
+            if due is None:
+                deadline = self.scheduler.next_deadline()
+                time.sleep(min(max(deadline - now, 0.0), 0.1) if deadline is not None else 0.1)
+                continue
+
             try:
-                self.bus.send(msg_query_steering_angle)
-                time.sleep(0.005)
-                if i % 4 == 0:
-                    self.bus.send(msg_query_speed)
-                    time.sleep(0.002)
-                if i % 4 == 2:
-                    self.bus.send(msg_query_brake_pressure)
-                    time.sleep(0.002)
-                if i % 8 == 1:
-                    self.bus.send(msg_query_rpm)
-                    time.sleep(0.002)
-                if i % 8 == 3:
-                    self.bus.send(msg_query_accelerator_fraction)
-                    time.sleep(0.002)
-                if i % 8 == 5:
-                    self.bus.send(msg_query_ignition_switch)
-                    time.sleep(0.002)
-                if i % 8 == 7:
-                    self.bus.send(msg_query_total_distance)
-                    time.sleep(0.002)
-                if i % 16 == 1:
-                    time.sleep(0.002)
-                    self.bus.send(msg_query_gps)
-                    time.sleep(0.002)
-                    self.bus.send(msg_query_gps_flow)
+                self._send_request(due, now)
+                time.sleep(self.send_interval)
+
+            except can.CanError:
+                print("can error")
+                continue
+
+    def _output_loop_adaptive(self):
+        while not self.request_stop:
+            # cleared before scanning so a response arriving mid-scan still
+            # wakes up the wait below
+            self.response_event.clear()
+            wait = self._poll_modules(time.monotonic())
+            if wait > 0.0:
+                self.response_event.wait(wait)
+
+    def _poll_modules(self, now):
+        """
+        Sends the next due request to every module that has none in flight.
+        Returns how long to wait at most before calling again.
+        """
+        wait = 0.1
+        for module in MODULES:
+            busy_until = self.outstanding[module]
+            if busy_until is not None:
+                if busy_until > now:
+                    wait = min(wait, busy_until - now)
+                    continue
+                # no response within response_timeout
+                for name in self.in_flight[module]:
+                    for signal_name in self.polled_signals[name]:
+                        self.stats[signal_name].on_timeout()
+
+            due = self._pop_request(now, module)
+            if due is None:
+                self.outstanding[module] = None
+                deadline = self.scheduler.next_deadline(module)
+                if deadline is not None:
+                    wait = min(wait, deadline - now)
+                continue
 
+            self.outstanding[module] = now + self.response_timeout
+            wait = 0.0
+            try:
+                self._send_request(due, now)
             except can.CanError:
                 print("can error")
                 continue
+        return wait
+
+    def _pop_request(self, now, module = None):
+        """
+        Pops the next due query and, if it is a ReadDataByIdentifier, any
+        other ones to the same module due within batch_horizon. Returns
+        (module, names, message) or None; message is the prebuilt query for a
+        single signal and None for a batch.
+        """
+        due = self.scheduler.pop_due(now, module)
+        if due is None:
+            return None
+        name, message = due
+        module = message.arbitration_id
+        signal = self.decoders.signals[name]
+        names = [name]
+        if signal.service != 0x22:
+            return module, names, message
+        limit = self.batch_limit[module]
+        while len(names) < limit:
+            peeked = self.scheduler.peek(module)
+            if peeked is None or peeked[0] > now + self.batch_horizon or peeked[1] in names:
+                break
+            if self.decoders.signals[peeked[1]].service != 0x22:
+                break
+            self.scheduler.pop_due(peeked[0], module)
+            names.append(peeked[1])
+        if len(names) == 1:
+            return module, names, message
+        return module, names, None
+
+    def _send_request(self, request, now):
+        module, names, message = request
+        self.last_batch[module] = len(names)
+        self.in_flight[module] = names
+        for name in names:
+            self.scheduler.mark_sent(name, now)
+            # without a response timeout in fixed pacing, a request counts as
+            # timed out when the next one goes out unanswered
+            timed_out = self.pacing == 'fixed' and self.unanswered[name]
+            self.unanswered[name] = True
+            for signal_name in self.polled_signals[name]:
+                if timed_out:
+                    self.stats[signal_name].on_timeout()
+                self.stats[signal_name].on_request()
+        if message is not None:
+            self.bus.send(message)
+            return
+        payload = bytearray([0x22])
+        for name in names:
+            payload += self.decoders.signals[name].did.to_bytes(2, "big")
+        if not self.channels[module + 8].send(payload):
+            print("module 0x%x did not accept request" % module)
+
+    def _on_response(self, module):
+        self.outstanding[module] = None
+        self.response_event.set()
 
     def _input_loop(self):
+        # recv() blocks in select() on the socket until a frame is available,
+        # so frames are handled as soon as they arrive; the timeout only
+        # bounds how long stop() takes to be noticed
         while not self.request_stop:
-            time.sleep(0.001)
             try:
-                message = self.bus.recv()
-                if message.arbitration_id == ECU_RESPONSE:
-                   self._process_ecu(message.data)
-                elif message.arbitration_id == ABS_RESPONSE:
-                   self._process_abs(message.data)
-                elif message.arbitration_id == BC_RESPONSE:
-                   self._process_bc(message.data)
-                elif message.arbitration_id == API_RESPONSE:
-                   self._process_api(message.data)
+                message = self.bus.recv(self.recv_timeout)
+                if message is not None:
+                    if self.recorder is not None:
+                        self.recorder.write(message)
+                    self._on_message(message)
             except can.CanError:
                 print("can error")
                 continue
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def _on_message(self, message):
+        handler = self.handlers.get(message.arbitration_id)
+        if handler is not None:
+            handler(message.data, message.timestamp)
+
+    def _on_broadcast(self, signals, data, timestamp):
+        now = time.monotonic()
+        for signal in signals:
+            self.stats[signal.name].on_response(now)
+            getattr(self, signal.callback)(signal.decode(data), timestamp)
+
+    def _process_payload(self, arbitration_id, buf, start, length, timestamp):
+        # a complete response (positive or negative) frees the module for the
+        # next request
+        module = arbitration_id - 8
+        self._on_response(module)
+        if length < 2:
+            return
+        if buf[start] == 0x7f:
+            # negative response
+            if self.last_batch[module] > 1 and self.batch_limit[module] > 1:
+                print("module 0x%x rejected a multi-DID request, falling back to one DID per request" % module)
+                self.batch_limit[module] = 1
+            return
+        now = time.monotonic()
+        for signals, base in self.decoders.records(arbitration_id, buf, start, length):
+            poll_name = self.poll_names[(module, signals[0].did)]
+            self.unanswered[poll_name] = False
+            sent = self.scheduler.entries[poll_name]["last_sent"]
+            latency = now - sent if sent is not None else None
+            for signal in signals:
+                self.stats[signal.name].on_response(now, latency)
+                getattr(self, signal.callback)(signal.decode(buf, base), timestamp)
 
     def _monitor_loop(self):
         while not self.request_stop:
             time.sleep(0.5)
-            if not self.thread_input.isAlive:
+            if not self.thread_input.is_alive():
                 self.stop()
-            if not self.thread_output.isAlive:
+            if self.mode == 'active' and not self.thread_output.is_alive():
                 self.stop()
-     
-    def _process_ecu(self, data):
-        if data[0:3] == b'\x04\x41\x0c':
-            rpm = int.from_bytes(data[3:5], "big") / 4.0
-            self.on_rpm(rpm)
-        elif data[0:4] == b'\x05\x62\x15\x05':
-            speed = int.from_bytes(data[4:6], "big") / 128.0
-            self.on_speed(speed)
-        elif data[0:4] == b'\x06\x62\xdd\x01':
-            total_distance = int.from_bytes(data[4:7], "big") / 1.0
-            self.on_total_distance(total_distance)
-        elif data[0:4] == b'\x04\x62\x03\x2b':
-            accelerator_fraction = data[4] / 255.0
-            self.on_accelerator_fraction(accelerator_fraction)
-        
-    def _process_abs(self, data):
-        if data[0:4] == b'\x05\x62\x33\x02':
-            steering_wheel_angle = (int.from_bytes(data[4:6], "big") - 7800) / 10.0
-            self.on_steering_wheel_angle(steering_wheel_angle)
-        elif data[0:4] == b'\x05\x62\x20\x34':
-            brake_pressure = int.from_bytes(data[4:6], "big", signed = True) * 30.0
-            self.on_brake_pressure(brake_pressure)
-
-    def _process_api(self, data):
-        if data[0:5] == b'\x10\x12\x62\x80\x12':
-            self.frame_api = 1
-        if self.frame_api == 1 and data[0] == 0x21:
-            lat = int.from_bytes(data[2:4], "big", signed=True) / 60.0
-            lon = int.from_bytes(data[6:8], "big", signed=True) / 60.0
-            self.on_gps((lat, lon))
-        if self.frame_api == 1 and data[0] == 0x22:
-            heading = int.from_bytes(data[4:6], "big") / 1.0
-            self.on_heading(heading)
-        return
-
-    def _process_bc(self, data):
-        if data[0:4] == b'\x04\x62\x41\x1f':
-            ignition_switch = data[4]
-            self.on_ignition_switch(ignition_switch)
-
@@ -0,0 +1,184 @@
+import threading
+import time
+
+import can
+
+# protocol control information, high nibble of the first byte
+SINGLE_FRAME = 0x0
+FIRST_FRAME = 0x1
+CONSECUTIVE_FRAME = 0x2
+FLOW_CONTROL = 0x3
+
+# flow status of a flow control frame
+CONTINUE_TO_SEND = 0x0
+WAIT = 0x1
+OVERFLOW = 0x2
+
+PADDING = 0x55
+
+def decode_st_min(value):
+    """
+    Separation time in seconds from the STmin byte of a flow control frame:
+    0x00-0x7f are milliseconds, 0xf1-0xf9 are 100-900 microseconds. Reserved
+    values are treated as the maximum, as the standard asks.
+    """
+    if value <= 0x7f:
+        return value / 1000.0
+    if 0xf1 <= value <= 0xf9:
+        return (value - 0xf0) / 10000.0
+    return 0.127
+
+class IsoTpChannel(object):
+    """
+    ISO 15765-2 transport between us (tx_id) and one module (rx_id).
+
+    Incoming frames are passed to feed(). Single frames are delivered straight
+    from the frame, multi-frame messages are reassembled in a preallocated
+    buffer; on_payload(rx_id, buf, start, length, timestamp) gets the complete
+    payload starting with the service id. The flow control frame is sent as
+    soon as the first frame arrives, advertising block_size and st_min.
+
+    send() transmits a payload, segmenting it and honouring the block size and
+    STmin of the flow control frames the module answers with.
+    """
+    def __init__(self, bus, tx_id, rx_id, on_payload, block_size = 0, st_min = 0,
+            max_length = 4095, flow_control_timeout = 1.0):
+        self.bus = bus
+        self.tx_id = tx_id
+        self.rx_id = rx_id
+        self.on_payload = on_payload
+        self.block_size = block_size
+        self.flow_control_timeout = flow_control_timeout
+
+        self.buffer = bytearray(max_length)
+        self.view = memoryview(self.buffer)
+        self.active = False
+        self.length = 0
+        self.received = 0
+        self.sequence = 0
+        self.block_remaining = 0
+        self.timestamp = None
+        self.errors = 0
+
+        self.msg_flow_control = can.Message(arbitration_id = tx_id,
+            data=[0x30 | CONTINUE_TO_SEND, block_size, st_min, PADDING, PADDING, PADDING, PADDING, PADDING],
+            extended_id=False)
+
+        self.flow_control_event = threading.Event()
+        self.flow_status = None
+        self.remote_block_size = 0
+        self.remote_st_min = 0.0
+
+    def feed(self, data, timestamp = None):
+        """
+        Handles one received frame. timestamp is its receive time, passed on
+        with the payload; a multi-frame payload gets the time of its first
+        frame, the closest to when the module read the values.
+        """
+        if not data:
+            return
+        pci = data[0] >> 4
+        if pci == SINGLE_FRAME:
+            length = data[0] & 0x0f
+            if 0 < length < len(data):
+                self.active = False
+                self.on_payload(self.rx_id, data, 1, length, timestamp)
+        elif pci == FIRST_FRAME:
+            self._first_frame(data, timestamp)
+        elif pci == CONSECUTIVE_FRAME:
+            self._consecutive_frame(data)
+        elif pci == FLOW_CONTROL:
+            self.flow_status = data[0] & 0x0f
+            self.remote_block_size = data[1]
+            self.remote_st_min = decode_st_min(data[2])
+            self.flow_control_event.set()
+
+    def _first_frame(self, data, timestamp):
+        length = ((data[0] & 0x0f) << 8) | data[1]
+        if length > len(self.buffer) or length < 8:
+            self.errors += 1
+            self.active = False
+            return
+        self.view[0:6] = data[2:8]
+        self.length = length
+        self.received = 6
+        self.sequence = 1
+        self.block_remaining = self.block_size
+        self.timestamp = timestamp
+        self.active = True
+        try:
+            self.bus.send(self.msg_flow_control)
+        except can.CanError:
+            print("can error")
+            self.active = False
+
+    def _consecutive_frame(self, data):
+        if not self.active:
+            return
+        if data[0] & 0x0f != self.sequence:
+            # lost or reordered frame, the message can't be completed
+            self.errors += 1
+            self.active = False
+            return
+        n = min(7, self.length - self.received, len(data) - 1)
+        self.view[self.received:self.received + n] = data[1:1 + n]
+        self.received += n
+        self.sequence = (self.sequence + 1) & 0x0f
+        if self.received >= self.length:
+            self.active = False
+            self.on_payload(self.rx_id, self.buffer, 0, self.length, self.timestamp)
+        elif self.block_size:
+            self.block_remaining -= 1
+            if self.block_remaining == 0:
+                self.block_remaining = self.block_size
+                try:
+                    self.bus.send(self.msg_flow_control)
+                except can.CanError:
+                    print("can error")
+                    self.active = False
+
+    def send(self, payload):
+        """
+        Sends a payload, blocking while waiting for flow control if it needs
+        more than one frame. Returns False if the module did not let us finish.
+        """
+        length = len(payload)
+        if length <= 7:
+            data = bytearray([length]) + bytearray(payload)
+            data += bytearray([PADDING] * (8 - len(data)))
+            self.bus.send(can.Message(arbitration_id = self.tx_id, data = data, extended_id = False))
+            return True
+
+        self.flow_control_event.clear()
+        data = bytearray([0x10 | (length >> 8), length & 0xff]) + bytearray(payload[0:6])
+        self.bus.send(can.Message(arbitration_id = self.tx_id, data = data, extended_id = False))
+
+        position = 6
+        sequence = 1
+        while position < length:
+            if not self._wait_flow_control():
+                return False
+            block = self.remote_block_size
+            st_min = self.remote_st_min
+            sent = 0
+            while position < length and (block == 0 or sent < block):
+                if sent:
+                    time.sleep(st_min)
+                chunk = bytearray(payload[position:position + 7])
+                chunk += bytearray([PADDING] * (7 - len(chunk)))
+                self.bus.send(can.Message(arbitration_id = self.tx_id,
+                    data = bytearray([0x20 | sequence]) + chunk, extended_id = False))
+                position += 7
+                sequence = (sequence + 1) & 0x0f
+                sent += 1
+        return True
+
+    def _wait_flow_control(self):
+        while True:
+            if not self.flow_control_event.wait(self.flow_control_timeout):
+                return False
+            self.flow_control_event.clear()
+            if self.flow_status == CONTINUE_TO_SEND:
+                return True
+            if self.flow_status != WAIT:
+                return False
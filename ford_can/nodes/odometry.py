@@ -0,0 +1,226 @@
+import collections
+import math
+import threading
+import time
+
+from periodic import run_periodic
+
+OdometryState = collections.namedtuple("OdometryState", ["timestamp", "x", "y", "yaw", "speed", "yaw_rate"])
+
+def wrap_angle(angle):
+    # to [-pi, pi)
+    return (angle + math.pi) % (2.0 * math.pi) - math.pi
+
+class YawRateEstimator(object):
+    """
+    Yaw rate from speed and steering wheel angle through a kinematic bicycle
+    model, speed * tan(road wheel angle) / wheelbase, the road wheel angle
+    being the steering wheel angle over steering_ratio minus a steering
+    offset.
+
+    correct() fuses in a heading: it moves the yaw integrated from the
+    estimates heading_gain of the way towards the heading, and adjusts the
+    steering offset by offset_gain of what it takes to account for the
+    remaining difference since the previous heading, so that a miscalibrated
+    steering angle stops making the yaw drift.
+
+    Speed is in m/s, angles in radians except the steering wheel angle,
+    which is in degrees, positive to the left, as decoded.
+    """
+    def __init__(self, wheelbase = 2.85, steering_ratio = 15.0, heading_gain = 0.1, offset_gain = 0.02,
+            min_speed = 1.0):
+        self.wheelbase = wheelbase
+        self.steering_ratio = steering_ratio
+        self.heading_gain = heading_gain
+        self.offset_gain = offset_gain
+        self.min_speed = min_speed
+        self.speed = 0.0
+        self.steering = 0.0
+        self.offset = 0.0
+        self.last_correction = None
+
+    def update_speed(self, speed):
+        self.speed = speed
+
+    def update_steering(self, angle):
+        self.steering = math.radians(angle) / self.steering_ratio
+
+    def yaw_rate(self):
+        return self.speed * math.tan(self.steering - self.offset) / self.wheelbase
+
+    def correct(self, yaw, heading, timestamp):
+        """
+        Returns yaw corrected towards heading, both at timestamp.
+        """
+        error = wrap_angle(heading - yaw)
+        if self.last_correction is not None and timestamp > self.last_correction:
+            # the offset is only observable while moving; the yaw rate
+            # changes by about -speed / wheelbase per radian of offset
+            if self.speed > self.min_speed:
+                rate_error = error / (timestamp - self.last_correction)
+                self.offset -= self.offset_gain * rate_error * self.wheelbase / self.speed
+        self.last_correction = timestamp
+        return wrap_angle(yaw + self.heading_gain * error)
+
+class DeadReckoning(object):
+    """
+    Dead-reckoned planar pose from the speed and heading signals, from
+    speed and steering_wheel_angle through a kinematic bicycle model with
+    source = 'steering', or with source = 'fused' from the bicycle model
+    corrected by the heading, see YawRateEstimator.
+
+    update() only queues the samples, so it can be called from the FordCAN
+    callbacks; a thread wakes up rate times per second, integrates the
+    queued samples in the order they arrived, each over the time since the
+    previous one given by their CAN timestamps, and calls
+    on_odometry(state) with an OdometryState if anything changed. An
+    exception in a cycle is passed to on_error(exception) and the thread
+    goes on.
+
+    Between two samples speed and yaw rate are held constant and the pose is
+    integrated in fixed steps of at most step seconds. Gaps longer than
+    max_gap seconds are not integrated over. At most queue_size samples are
+    kept between cycles, the oldest dropped first, so a cycle costs at most
+    queue_size * max_gap / step integration steps.
+
+    Speed is in km/h and heading in degrees clockwise from north, as decoded;
+    yaw is -heading in radians, counterclockwise with x pointing north. The
+    steering wheel angle is in degrees, positive to the left, and divided by
+    steering_ratio to get the road wheel angle; wheelbase is in meters.
+    heading_gain and offset_gain are those of the YawRateEstimator.
+    """
+    def __init__(self, rate = 50.0, source = 'heading', wheelbase = 2.85, steering_ratio = 15.0,
+            step = 0.01, max_gap = 0.5, queue_size = 1000, heading_gain = 0.1, offset_gain = 0.02):
+        if rate <= 0:
+            raise ValueError("odometry rate must be positive, got %s" % rate)
+        if source not in ('heading', 'steering', 'fused'):
+            raise ValueError("unknown odometry source: %s" % source)
+        self.period = 1.0 / rate
+        self.source = source
+        self.step = step
+        self.max_gap = max_gap
+        self.samples = collections.deque(maxlen = queue_size)
+        self.estimator = YawRateEstimator(wheelbase, steering_ratio, heading_gain, offset_gain)
+        if source == 'heading':
+            self.inputs = frozenset(["speed", "heading"])
+        elif source == 'steering':
+            self.inputs = frozenset(["speed", "steering_wheel_angle"])
+        else:
+            self.inputs = frozenset(["speed", "steering_wheel_angle", "heading"])
+
+        self.timestamp = None
+        self.x = 0.0
+        self.y = 0.0
+        self.yaw = 0.0
+        self.speed = 0.0
+        self.yaw_rate = 0.0
+        self.last_heading = None
+        self.published = None
+
+        self.on_odometry = lambda state: 0
+        self.on_error = lambda error: print("odometry error: %s" % error)
+        self.request_stop = False
+        self.thread = None
+
+    def update(self, name, value, timestamp):
+        if name in self.inputs:
+            self.samples.append((name, value, timestamp))
+
+    def start(self):
+        self.request_stop = False
+        self.thread = threading.Thread(target = self._odometry_loop)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.request_stop = True
+
+    def state(self):
+        return OdometryState(self.timestamp, self.x, self.y, self.yaw, self.speed, self.yaw_rate)
+
+    def age(self, now = None):
+        """
+        Seconds since the last sample integrated, None if there was none yet.
+        """
+        if self.timestamp is None:
+            return None
+        if now is None:
+            now = time.time()
+        return now - self.timestamp
+
+    def process(self):
+        """
+        Integrates the queued samples. Returns the number of samples.
+        """
+        count = 0
+        while True:
+            try:
+                name, value, timestamp = self.samples.popleft()
+            except IndexError:
+                return count
+            self._advance(timestamp)
+            if name == "speed":
+                self.speed = value / 3.6 # km/h to m/s
+                self.estimator.update_speed(self.speed)
+            elif name == "heading":
+                self._on_heading(-math.radians(value), timestamp)
+            else:
+                self.estimator.update_steering(value)
+            if self.source != 'heading':
+                self.yaw_rate = self.estimator.yaw_rate()
+            count += 1
+
+    def _advance(self, timestamp):
+        if self.timestamp is None:
+            self.timestamp = timestamp
+            return
+        dt = timestamp - self.timestamp
+        if dt <= 0.0:
+            # out of order, apply it at the current time
+            return
+        self.timestamp = timestamp
+        if dt > self.max_gap:
+            return
+        steps = int(math.ceil(dt / self.step))
+        h = dt / steps
+        v = self.speed
+        w = self.yaw_rate
+        x = self.x
+        y = self.y
+        yaw = self.yaw
+        for _ in range(steps):
+            # midpoint rule, exact for straight lines
+            mid = yaw + 0.5 * w * h
+            x += v * h * math.cos(mid)
+            y += v * h * math.sin(mid)
+            yaw += w * h
+        self.x = x
+        self.y = y
+        self.yaw = wrap_angle(yaw)
+
+    def _on_heading(self, yaw, timestamp):
+        if self.source == 'fused':
+            # the first heading sets the yaw, later ones correct it
+            if self.last_heading is None:
+                self.estimator.last_correction = timestamp
+            else:
+                yaw = self.estimator.correct(self.yaw, yaw, timestamp)
+            self.last_heading = (yaw, timestamp)
+            self.yaw = yaw
+            return
+        if self.last_heading is not None:
+            last_yaw, last_timestamp = self.last_heading
+            if timestamp > last_timestamp:
+                rate = wrap_angle(yaw - last_yaw) / (timestamp - last_timestamp)
+                self.yaw_rate = 0.8 * self.yaw_rate + 0.2 * rate
+        self.last_heading = (yaw, timestamp)
+        self.yaw = yaw
+
+    def _cycle(self):
+        self.process()
+        if self.timestamp is not None and self.timestamp != self.published:
+            self.published = self.timestamp
+            self.on_odometry(self.state())
+
+    def _odometry_loop(self):
+        run_periodic(self.period, self._cycle, lambda: self.request_stop, self.on_error)
@@ -0,0 +1,23 @@
+import time
+
+def run_periodic(period, cycle, stopped, on_error):
+    """
+    Calls cycle() every period seconds on the monotonic clock until stopped()
+    returns True. A cycle that overruns is followed by the next one right
+    away and the schedule restarts from there, without catching up. An
+    exception from cycle() is passed to on_error(exception) and the loop goes
+    on with the next cycle.
+    """
+    next_cycle = time.monotonic()
+    while not stopped():
+        next_cycle += period
+        try:
+            cycle()
+        except Exception as error:
+            on_error(error)
+        delay = next_cycle - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            # fell behind, start counting from now
+            next_cycle = time.monotonic()
@@ -0,0 +1,92 @@
+import threading
+
+from periodic import run_periodic
+
+class PublishStage(object):
+    """
+    Decouples decoding from publishing. The FordCAN callbacks only store each
+    sample in its signal's slot with update(); a publisher thread wakes up
+    rate times per second and publishes the slots that changed since the
+    last cycle, filling one preallocated message per topic, plus any
+    aggregate messages, which go out on every cycle.
+
+    A slot holds the latest (value, timestamp) and is replaced with a single
+    dict assignment, so writer and publisher never lock; samples arriving
+    faster than the publish rate are coalesced to the latest one.
+
+    An exception from a fill or publish call only skips that message; it is
+    passed to on_error(name, exception), name being the signal name, the
+    message type of an aggregate or None for an error outside a message.
+    """
+    def __init__(self, rate):
+        if rate <= 0:
+            raise ValueError("publish rate must be positive, got %s" % rate)
+        self.period = 1.0 / rate
+        self.slots = {}
+        self.outputs = []
+        self.aggregates = []
+        self.published = {}
+        self.on_error = lambda name, error: print("error publishing %s: %s" % (name, error))
+        self.request_stop = False
+        self.thread = None
+
+    def update(self, name, value, timestamp):
+        self.slots[name] = (value, timestamp)
+
+    def add(self, name, publish, message, fill):
+        """
+        Publishes signal name on every cycle it has a new sample:
+        fill(message, value, timestamp) then publish(message).
+        """
+        self.outputs.append((name, publish, message, fill))
+
+    def add_aggregate(self, publish, message, fill):
+        """
+        Publishes one message on every cycle, at the fixed rate, once there
+        is a sample of any signal: fill(message, slots) then
+        publish(message), slots being {name: (value, timestamp)}.
+        """
+        self.aggregates.append((publish, message, fill))
+
+    def start(self):
+        self.request_stop = False
+        self.thread = threading.Thread(target = self._publish_loop)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.request_stop = True
+
+    def flush(self):
+        """
+        Publishes what changed since the last call. Returns the number of
+        messages published.
+        """
+        # the slots are read once, anything arriving meanwhile goes out on
+        # the next cycle
+        slots = dict(self.slots)
+        count = 0
+        for name, publish, message, fill in self.outputs:
+            sample = slots.get(name)
+            if sample is None or sample is self.published.get(name):
+                continue
+            try:
+                fill(message, sample[0], sample[1])
+                publish(message)
+                count += 1
+            except Exception as error:
+                self.on_error(name, error)
+        self.published = slots
+        if slots:
+            for publish, message, fill in self.aggregates:
+                try:
+                    fill(message, slots)
+                    publish(message)
+                    count += 1
+                except Exception as error:
+                    self.on_error(type(message).__name__, error)
+        return count
+
+    def _publish_loop(self):
+        run_periodic(self.period, self.flush, lambda: self.request_stop,
+            lambda error: self.on_error(None, error))
@@ -0,0 +1,71 @@
+import mmap
+import os
+import struct
+import time
+
+# one received frame per record: timestamp, arbitration id, dlc and 8 data
+# bytes padded to 24 bytes, the layout of batch.FRAME_DTYPE
+RECORD = struct.Struct("<dIB8s3x")
+
+class FrameRecorder(object):
+    """
+    Appends raw frames to fixed-size segment files through a memory map, so
+    recording a frame is a single struct.pack_into with no file calls. A
+    segment holds segment_frames records; when it is full it is closed and
+    the next one is started. If max_segments is set, the oldest segments of
+    this recording are deleted to keep at most that many on disk.
+
+    Segment files have no header, so each one (or batch.load on the whole
+    directory) maps straight onto a NumPy array of batch.FRAME_DTYPE. A
+    segment that was not closed cleanly ends in zeroed records.
+    """
+    def __init__(self, directory, segment_frames = 1 << 20, max_segments = 0, prefix = "frames"):
+        if segment_frames <= 0:
+            raise ValueError("segment_frames must be positive, got %s" % segment_frames)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        self.segment_size = segment_frames * RECORD.size
+        self.max_segments = max_segments
+        self.prefix = "%s-%s" % (prefix, time.strftime("%Y%m%d-%H%M%S"))
+        self.segments = []
+        self.index = 0
+        self.frames = 0
+
+        self.file = None
+        self.map = None
+        self.offset = 0
+        self._open_segment()
+
+    def _open_segment(self):
+        path = os.path.join(self.directory, "%s-%05d.bin" % (self.prefix, self.index))
+        self.index += 1
+        self.file = open(path, "w+b")
+        self.file.truncate(self.segment_size)
+        self.map = mmap.mmap(self.file.fileno(), self.segment_size)
+        self.offset = 0
+        self.segments.append(path)
+        while self.max_segments and len(self.segments) > self.max_segments:
+            os.remove(self.segments.pop(0))
+
+    def _close_segment(self):
+        self.map.flush()
+        self.map.close()
+        # cut off the unused part of the preallocated segment
+        self.file.truncate(self.offset)
+        self.file.close()
+        self.map = None
+        self.file = None
+
+    def write(self, message):
+        if self.offset == self.segment_size:
+            self._close_segment()
+            self._open_segment()
+        RECORD.pack_into(self.map, self.offset, message.timestamp, message.arbitration_id,
+            message.dlc, bytes(message.data))
+        self.offset += RECORD.size
+        self.frames += 1
+
+    def close(self):
+        if self.map is not None:
+            self._close_segment()
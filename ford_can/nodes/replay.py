@@ -0,0 +1,211 @@
+import bisect
+import queue
+import time
+
+import can
+import numpy
+
+import batch
+import fordcan
+from decoders import DID_LENGTH, RESPONSE_SERVICE, DecoderRegistry, Signal
+from isotp import CONSECUTIVE_FRAME, FIRST_FRAME, FLOW_CONTROL, PADDING, SINGLE_FRAME
+
+# negative response code for a DID that isn't in the recording
+REQUEST_OUT_OF_RANGE = 0x31
+
+class ReplayBus(can.BusABC):
+    """
+    A python-can bus that plays back a recording (a FRAME_DTYPE array, e.g.
+    from batch.load) in place of the car, so FordCAN and ford_can_node run
+    unchanged without a vehicle or adapter.
+
+    The recorded diagnostic responses are split into one record per
+    (response id, service, DID). Queries sent on the bus are answered right
+    away, ISO-TP framed like a module would, with the recorded record of each
+    DID asked for; multi-DID requests get every DID they ask for. Frames of
+    any other id (broadcasts) are played back by themselves.
+
+    With speed > 0 playback follows the recorded timing, speed times faster:
+    a query gets every record of its DIDs up to the current playback time
+    that it hasn't been given yet, one response after the other, and
+    broadcast frames are delivered when their time comes. With speed 0 it
+    runs as fast as possible: every query gets the next record of its DIDs
+    in recorded order and broadcast frames are delivered back to back.
+    Either way a run sees every recorded value exactly once, in order; a
+    query with nothing new gets a response without any record. FordCAN polls
+    at wall-clock rates, see FordCAN.scale_poll_rates to keep up.
+
+    signal_table gives the record layouts and defaults to fordcan.SIGNALS;
+    it has to cover the DIDs in the recording.
+    """
+    def __init__(self, frames, speed = 1.0, signal_table = None, channel = "replay", can_filters = None, **kwargs):
+        if speed < 0:
+            raise ValueError("speed must not be negative, got %s" % speed)
+        self.speed = speed
+        if signal_table is None:
+            signal_table = fordcan.SIGNALS
+        registry = DecoderRegistry(Signal.from_dict(definition) for definition in signal_table)
+        response_ids = set(key[0] for key in registry.table)
+
+        # (response id, service, did) -> ([recorded time], [record bytes])
+        self.records = {}
+        ids = frames["arbitration_id"]
+        for response_id in sorted(response_ids):
+            selected = ids == response_id
+            if not selected.any():
+                continue
+            payloads, lengths, times = batch._payloads(frames["data"][selected], frames["timestamp"][selected])
+            for payload, length, t in zip(payloads, lengths, times):
+                buf = bytes(payload[:length])
+                service = buf[0]
+                for signals, base in registry.records(response_id, buf, 0, len(buf)):
+                    did = int.from_bytes(buf[base - DID_LENGTH[service]:base], "big")
+                    record_length = registry.table[(response_id, service, did)][1]
+                    times_list, records = self.records.setdefault((response_id, service, did), ([], []))
+                    times_list.append(float(t))
+                    records.append(buf[base:base + record_length])
+
+        broadcast = numpy.nonzero(~numpy.isin(ids, list(response_ids)))[0]
+        self.broadcast = frames[broadcast]
+        self.broadcast_index = 0
+
+        self.start_time = float(frames["timestamp"].min()) if len(frames) else 0.0
+        self.end_time = float(frames["timestamp"].max()) if len(frames) else 0.0
+        self.replay_start = None
+        self.next_record = dict((key, 0) for key in self.records)
+
+        # frames waiting to be received and requests being reassembled
+        self.responses = queue.Queue()
+        self.requests = {}
+
+        super(ReplayBus, self).__init__(channel, can_filters = can_filters, **kwargs)
+        self.channel_info = "replay of %d frames at %sx" % (len(frames), speed or "max ")
+
+    def playback_time(self):
+        """
+        Current position in the recording, in recorded timestamps.
+        """
+        if self.replay_start is None:
+            self.replay_start = time.monotonic()
+        return self.start_time + (time.monotonic() - self.replay_start) * self.speed
+
+    @property
+    def finished(self):
+        if self.broadcast_index < len(self.broadcast):
+            return False
+        if any(self.next_record[key] < len(self.records[key][1]) for key in self.records):
+            return False
+        return self.speed == 0 or self.playback_time() > self.end_time
+
+    def _due_records(self, key):
+        """
+        Returns the records of key not handed out yet that are due, and
+        marks them as handed out.
+        """
+        times, records = self.records[key]
+        index = self.next_record[key]
+        if self.speed == 0:
+            end = min(index + 1, len(records))
+        else:
+            end = max(bisect.bisect_right(times, self.playback_time()), index)
+        self.next_record[key] = end
+        return records[index:end]
+
+    def _frame(self, arbitration_id, data):
+        data = bytearray(data) + bytearray([PADDING] * (8 - len(data)))
+        return can.Message(timestamp = time.time(), arbitration_id = arbitration_id, data = data,
+            extended_id = False)
+
+    def _respond(self, response_id, payload):
+        if len(payload) <= 7:
+            self.responses.put(self._frame(response_id, [len(payload)] + list(payload)))
+            return
+        # the flow control of the receiver is not waited for
+        self.responses.put(self._frame(response_id,
+            [(FIRST_FRAME << 4) | (len(payload) >> 8), len(payload) & 0xff] + list(payload[:6])))
+        sequence = 1
+        for position in range(6, len(payload), 7):
+            self.responses.put(self._frame(response_id,
+                [(CONSECUTIVE_FRAME << 4) | sequence] + list(payload[position:position + 7])))
+            sequence = (sequence + 1) & 0x0f
+
+    def _answer(self, response_id, request):
+        service = request[0]
+        response_service = RESPONSE_SERVICE.get(service)
+        if response_service is None:
+            self._respond(response_id, bytearray([0x7f, service, REQUEST_OUT_OF_RANGE]))
+            return
+        did_length = DID_LENGTH[response_service]
+        # [did, [due records]] of every DID asked for that is in the recording
+        due = []
+        for position in range(1, len(request) - did_length + 1, did_length):
+            did = int.from_bytes(request[position:position + did_length], "big")
+            key = (response_id, response_service, did)
+            if key in self.records:
+                due.append([did, self._due_records(key)])
+        if not due:
+            self._respond(response_id, bytearray([0x7f, service, REQUEST_OUT_OF_RANGE]))
+            return
+        if not any(records for did, records in due):
+            if self.speed > 0 and self.playback_time() > self.end_time:
+                # once the recording is over the module stays silent
+                return
+            self._respond(response_id, bytearray([response_service]))
+            return
+        # a response carries one record per DID, a backlog goes out as
+        # several responses back to back
+        while any(records for did, records in due):
+            payload = bytearray([response_service])
+            for entry in due:
+                did, records = entry
+                if records:
+                    payload += did.to_bytes(did_length, "big") + records[0]
+                    entry[1] = records[1:]
+            self._respond(response_id, payload)
+
+    def send(self, msg, timeout = None):
+        data = msg.data
+        response_id = msg.arbitration_id + 8
+        pci = data[0] >> 4
+        if pci == SINGLE_FRAME:
+            self._answer(response_id, bytes(data[1:1 + (data[0] & 0x0f)]))
+        elif pci == FIRST_FRAME:
+            length = ((data[0] & 0x0f) << 8) | data[1]
+            self.requests[response_id] = (length, bytearray(data[2:8]))
+            self.responses.put(self._frame(response_id, [FLOW_CONTROL << 4, 0, 0]))
+        elif pci == CONSECUTIVE_FRAME and response_id in self.requests:
+            length, request = self.requests[response_id]
+            request += data[1:8]
+            if len(request) >= length:
+                del self.requests[response_id]
+                self._answer(response_id, bytes(request[:length]))
+        # flow control frames of multi-frame responses need no answer
+
+    def _next_broadcast(self):
+        row = self.broadcast[self.broadcast_index]
+        self.broadcast_index += 1
+        return can.Message(timestamp = time.time(), arbitration_id = int(row["arbitration_id"]),
+            dlc = int(row["dlc"]), data = bytearray(row["data"][:row["dlc"]]), extended_id = False)
+
+    def _recv_internal(self, timeout):
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = None if end is None else max(end - time.monotonic(), 0.0)
+            if self.broadcast_index < len(self.broadcast):
+                if self.speed == 0:
+                    wait = 0.0
+                else:
+                    due = (float(self.broadcast[self.broadcast_index]["timestamp"]) - self.playback_time()) / self.speed
+                    if due <= 0.0:
+                        return self._next_broadcast(), False
+                    wait = due if wait is None else min(wait, due)
+            try:
+                if wait == 0.0:
+                    return self.responses.get_nowait(), False
+                return self.responses.get(timeout = wait), False
+            except queue.Empty:
+                pass
+            if self.speed == 0 and self.broadcast_index < len(self.broadcast):
+                return self._next_broadcast(), False
+            if end is not None and time.monotonic() >= end:
+                return None, False
@@ -0,0 +1,126 @@
+import heapq
+import time
+
+class PollScheduler(object):
+    """
+    Deadline scheduler for periodic queries. Each entry has a target rate in Hz
+    and belongs to a lane (e.g. the module it queries). Every lane keeps its own
+    heap keyed on the next monotonic-clock deadline, so lanes can be served
+    independently and the caller only ever has to look at the earliest entry.
+    """
+    def __init__(self, clock = time.monotonic, smoothing = 0.1):
+        self.clock = clock
+        self.smoothing = smoothing
+        self.entries = {}
+        self.heaps = {}
+
+    def lanes(self):
+        return list(self.heaps.keys())
+
+    def add(self, name, payload, rate, lane = None):
+        if rate <= 0:
+            raise ValueError("rate for %s must be positive, got %s" % (name, rate))
+        self.entries[name] = {
+            "payload": payload,
+            "rate": float(rate),
+            "period": 1.0 / rate,
+            "last_sent": None,
+            "interval": None,
+            "count": 0,
+        }
+        heapq.heappush(self.heaps.setdefault(lane, []), (self.clock(), name))
+
+    def set_rate(self, name, rate):
+        if rate <= 0:
+            raise ValueError("rate for %s must be positive, got %s" % (name, rate))
+        entry = self.entries[name]
+        entry["rate"] = float(rate)
+        entry["period"] = 1.0 / rate
+
+    def next_deadline(self, lane = None):
+        """
+        Earliest deadline in the given lane, or over all lanes if lane is None.
+        """
+        if lane is not None:
+            heap = self.heaps.get(lane)
+            return heap[0][0] if heap else None
+        deadlines = [heap[0][0] for heap in self.heaps.values() if heap]
+        return min(deadlines) if deadlines else None
+
+    def peek(self, lane):
+        """
+        Returns (deadline, name) of the earliest entry in a lane without
+        removing it, or None for an empty lane.
+        """
+        heap = self.heaps.get(lane)
+        return heap[0] if heap else None
+
+    def pop_due(self, now = None, lane = None):
+        """
+        Returns (name, payload) of the most overdue entry, optionally restricted
+        to one lane, or None if nothing is due yet. The entry is rescheduled one
+        period after its old deadline; if it has fallen more than a period
+        behind it is re-anchored to now instead of firing a burst of catch-up
+        queries.
+        """
+        if now is None:
+            now = self.clock()
+        if lane is None:
+            heap = None
+            for candidate in self.heaps.values():
+                if candidate and (heap is None or candidate[0][0] < heap[0][0]):
+                    heap = candidate
+        else:
+            heap = self.heaps.get(lane)
+        if not heap or heap[0][0] > now:
+            return None
+        deadline, name = heap[0]
+        entry = self.entries[name]
+        deadline += entry["period"]
+        if deadline < now:
+            deadline = now + entry["period"]
+        heapq.heapreplace(heap, (deadline, name))
+        return name, entry["payload"]
+
+    def make_due(self, name, t = None):
+        """
+        Moves the deadline of an entry forward to t (default now), so it is
+        sent as soon as its lane is served; a deadline already before t is
+        kept.
+        """
+        if t is None:
+            t = self.clock()
+        for heap in self.heaps.values():
+            for index, (deadline, entry_name) in enumerate(heap):
+                if entry_name == name:
+                    if deadline > t:
+                        heap[index] = (t, name)
+                        heapq.heapify(heap)
+                    return
+        raise KeyError(name)
+
+    def mark_sent(self, name, t = None):
+        if t is None:
+            t = self.clock()
+        entry = self.entries[name]
+        if entry["last_sent"] is not None:
+            dt = t - entry["last_sent"]
+            if entry["interval"] is None:
+                entry["interval"] = dt
+            else:
+                entry["interval"] += self.smoothing * (dt - entry["interval"])
+        entry["last_sent"] = t
+        entry["count"] += 1
+
+    def rates(self):
+        """
+        Returns {name: (requested_hz, achieved_hz)}. The achieved rate is an
+        exponential moving average over recent send intervals, 0.0 until the
+        entry has been sent twice.
+        """
+        result = {}
+        for name, entry in self.entries.items():
+            interval = entry["interval"]
+            achieved = 1.0 / interval if interval else 0.0
+            result[name] = (entry["rate"], achieved)
+        return result
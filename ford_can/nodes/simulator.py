@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the car's modules on a python-can virtual bus or a vcan
+interface, answering the requests FordCAN sends with made up signal values.
+
+  ./simulator.py --channel vcan0 --bustype socketcan --latency 0.002 --jitter 0.001 --drop 0.01
+"""
+import argparse
+import heapq
+import math
+import random
+import threading
+import time
+
+import can
+
+import fordcan
+from decoders import DID_LENGTH, RESPONSE_SERVICE, DecoderRegistry, Signal
+from isotp import IsoTpChannel
+
+# negative response codes
+SERVICE_NOT_SUPPORTED = 0x11
+REQUEST_OUT_OF_RANGE = 0x31
+
+class Waveform(object):
+    """
+    Value of a simulated signal over time:
+    mean + amplitude * sin(2 pi t / period) + uniform noise in [-noise, noise].
+    Multi-value signals take one waveform per value.
+    """
+    def __init__(self, mean = 0.0, amplitude = 0.0, period = 10.0, noise = 0.0):
+        self.mean = mean
+        self.amplitude = amplitude
+        self.period = period
+        self.noise = noise
+
+    @classmethod
+    def from_dict(cls, definition):
+        return cls(**definition)
+
+    def __call__(self, t, rng = random):
+        value = self.mean + self.amplitude * math.sin(2.0 * math.pi * t / self.period)
+        if self.noise:
+            value += rng.uniform(-self.noise, self.noise)
+        return value
+
+# plausible values for the built-in signals
+DEFAULT_WAVEFORMS = {
+    "rpm": Waveform(1800.0, 1200.0, 12.0, 20.0),
+    "speed": Waveform(50.0, 40.0, 30.0, 0.5),
+    "total_distance": Waveform(12345.0),
+    "accelerator_fraction": Waveform(0.3, 0.25, 8.0, 0.01),
+    "steering_wheel_angle": Waveform(0.0, 90.0, 6.0, 0.5),
+    "brake_pressure": Waveform(300.0, 300.0, 15.0),
+    "ignition_switch": Waveform(3.0),
+    "gps": (Waveform(42.36, 0.001, 60.0), Waveform(-71.09, 0.001, 45.0)),
+    "heading": Waveform(180.0, 179.0, 40.0),
+}
+
+class EcuSimulator(object):
+    """
+    Answers diagnostic requests for the modules in fordcan.MODULES with the
+    signals of signal_table (fordcan.SIGNALS by default), over ISO-TP with
+    flow control like the real modules, so multi-frame and multi-DID
+    requests work.
+
+    Every response is delayed by latency plus a uniform random jitter, and a
+    fraction drop_rate of the requests is never answered. waveforms maps
+    signal names to a Waveform (or a tuple of them for multi-value signals),
+    a dict of Waveform arguments or any callable of the time in seconds;
+    signals without one read 0. block_size and st_min are what the modules
+    ask for when receiving a multi-frame request.
+
+    requests counts the requests received per module, answered the
+    responses sent.
+    """
+    def __init__(self, channel = 'vcan0', bustype = 'socketcan', latency = 0.0, jitter = 0.0,
+            drop_rate = 0.0, waveforms = None, signal_table = None, block_size = 0, st_min = 0,
+            seed = None, bus = None):
+        if bus is None:
+            bus = can.interface.Bus(channel = channel, bustype = bustype, can_filters = [
+                {"can_id": module, "can_mask": 0x7FF, "extended": False} for module in fordcan.MODULES])
+        self.bus = bus
+        self.latency = latency
+        self.jitter = jitter
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+        self.request_stop = False
+
+        if signal_table is None:
+            signal_table = fordcan.SIGNALS
+        self.registry = DecoderRegistry(Signal.from_dict(definition) for definition in signal_table)
+
+        self.waveforms = dict(DEFAULT_WAVEFORMS)
+        for name, waveform in (waveforms or {}).items():
+            if isinstance(waveform, dict):
+                waveform = Waveform.from_dict(waveform)
+            elif isinstance(waveform, (list, tuple)):
+                waveform = tuple(Waveform.from_dict(w) if isinstance(w, dict) else w for w in waveform)
+            self.waveforms[name] = waveform
+
+        # ISO-TP channel per module, the tester's requests arriving on the
+        # module's query id and responses going out on query id + 8
+        self.channels = {}
+        for module in fordcan.MODULES:
+            self.channels[module] = IsoTpChannel(self.bus, module + 8, module, self._on_request,
+                block_size = block_size, st_min = st_min)
+
+        # responses waiting for their latency to pass, per module so a slow
+        # multi-frame response holds up only its own module
+        self.pending = dict((module, []) for module in fordcan.MODULES)
+        self.pending_condition = threading.Condition()
+        self.requests = dict((module, 0) for module in fordcan.MODULES)
+        self.answered = dict((module, 0) for module in fordcan.MODULES)
+        self.start_time = time.monotonic()
+
+    def start(self):
+        self.request_stop = False
+        self.threads = [threading.Thread(target = self._input_loop)]
+        for module in fordcan.MODULES:
+            self.threads.append(threading.Thread(target = self._output_loop, args = (module,)))
+        for thread in self.threads:
+            thread.daemon = True
+            thread.start()
+
+    def stop(self):
+        self.request_stop = True
+        with self.pending_condition:
+            self.pending_condition.notify_all()
+
+    def value(self, name, t):
+        waveform = self.waveforms.get(name)
+        if waveform is None:
+            return 0.0
+        if isinstance(waveform, tuple):
+            return tuple(w(t, self.random) for w in waveform)
+        if isinstance(waveform, Waveform):
+            return waveform(t, self.random)
+        return waveform(t)
+
+    def record(self, response_id, service, did, t):
+        """
+        The data record for a DID at time t, or None if no signal uses it.
+        """
+        entry = self.registry.table.get((response_id, service, did))
+        if entry is None:
+            return None
+        signals, record_length = entry
+        buf = bytearray(record_length)
+        for signal in signals:
+            signal.encode(self.value(signal.name, t), buf, 0)
+        return buf
+
+    def respond(self, module, request, t):
+        """
+        Builds the response payload to a request payload the way a module
+        does: every DID asked for that it knows, or a negative response.
+        """
+        service = request[0]
+        response_service = RESPONSE_SERVICE.get(service)
+        if response_service is None:
+            return bytearray([0x7f, service, SERVICE_NOT_SUPPORTED])
+        did_length = DID_LENGTH[response_service]
+        dids = [int.from_bytes(request[i:i + did_length], "big")
+            for i in range(1, len(request) - did_length + 1, did_length)]
+        # OBD-II requests ask for one PID at a time here
+        if service == 0x01:
+            dids = dids[:1]
+        payload = bytearray([response_service])
+        for did in dids:
+            record = self.record(module + 8, response_service, did, t)
+            if record is not None:
+                payload += did.to_bytes(did_length, "big") + record
+        if len(payload) == 1:
+            return bytearray([0x7f, service, REQUEST_OUT_OF_RANGE])
+        return payload
+
+    def _on_request(self, rx_id, buf, start, length, timestamp):
+        module = rx_id
+        self.requests[module] += 1
+        if self.drop_rate and self.random.random() < self.drop_rate:
+            return
+        now = time.monotonic()
+        payload = self.respond(module, bytes(buf[start:start + length]), now - self.start_time)
+        due = now + self.latency
+        if self.jitter:
+            due += self.random.uniform(0.0, self.jitter)
+        with self.pending_condition:
+            heapq.heappush(self.pending[module], (due, self.requests[module], payload))
+            self.pending_condition.notify_all()
+
+    def _input_loop(self):
+        while not self.request_stop:
+            try:
+                message = self.bus.recv(0.1)
+                if message is None:
+                    continue
+                channel = self.channels.get(message.arbitration_id)
+                if channel is not None:
+                    channel.feed(message.data)
+            except can.CanError:
+                print("can error")
+                continue
+
+    def _output_loop(self, module):
+        heap = self.pending[module]
+        while not self.request_stop:
+            with self.pending_condition:
+                now = time.monotonic()
+                if not heap or heap[0][0] > now:
+                    self.pending_condition.wait(min(heap[0][0] - now, 0.1) if heap else 0.1)
+                    continue
+                due, seq, payload = heapq.heappop(heap)
+            try:
+                if self.channels[module].send(payload):
+                    self.answered[module] += 1
+            except can.CanError:
+                print("can error")
+                continue
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "simulated Ford modules")
+    parser.add_argument("--channel", default = "vcan0")
+    parser.add_argument("--bustype", default = "socketcan")
+    parser.add_argument("--latency", type = float, default = 0.002, help = "response latency in s")
+    parser.add_argument("--jitter", type = float, default = 0.0, help = "random extra latency up to this in s")
+    parser.add_argument("--drop", type = float, default = 0.0, help = "fraction of requests not answered")
+    parser.add_argument("--seed", type = int, default = None)
+    args = parser.parse_args()
+
+    simulator = EcuSimulator(channel = args.channel, bustype = args.bustype, latency = args.latency,
+        jitter = args.jitter, drop_rate = args.drop, seed = args.seed)
+    simulator.start()
+    try:
+        while True:
+            time.sleep(1.0)
+            print(" ".join("0x%x: %d/%d" % (module, simulator.answered[module], simulator.requests[module])
+                for module in fordcan.MODULES))
+    except KeyboardInterrupt:
+        simulator.stop()
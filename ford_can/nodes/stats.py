@@ -0,0 +1,108 @@
+import time
+
+class Histogram(object):
+    """
+    Histogram of durations in power-of-two microsecond buckets: bucket i
+    counts durations below 2**i us. Adding a value is a few integer
+    operations; percentiles are only worked out when a summary is asked for
+    and are accurate to the bucket, i.e. within a factor of two.
+    """
+    BUCKETS = 32
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        bucket = int(seconds * 1e6).bit_length() if seconds > 0.0 else 0
+        if bucket >= self.BUCKETS:
+            bucket = self.BUCKETS - 1
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p):
+        """
+        Upper bound in seconds of the bucket holding the p-th percentile,
+        0.0 if empty.
+        """
+        if not self.count:
+            return 0.0
+        rank = self.count * p / 100.0
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return (1 << bucket) / 1e6
+        return self.max
+
+class SignalStats(object):
+    """
+    Counters for one signal: requests sent, responses received, requests that
+    timed out, request-to-response latency and time between responses.
+
+    There are no locks: requests and timeouts are only counted by the output
+    thread and everything else only by the input thread, so every attribute
+    has a single writer. A summary read from another thread may be a frame
+    behind, which doesn't matter at the rates it is read.
+    """
+    def __init__(self, clock = time.monotonic):
+        self.clock = clock
+        self.requests = 0
+        self.responses = 0
+        self.timeouts = 0
+        self.last_response = None
+        self.latency = Histogram()
+        self.interval = Histogram()
+
+    def on_request(self):
+        self.requests += 1
+
+    def on_timeout(self):
+        self.timeouts += 1
+
+    def on_response(self, t, latency = None):
+        if self.last_response is not None:
+            self.interval.add(t - self.last_response)
+        self.last_response = t
+        self.responses += 1
+        if latency is not None:
+            self.latency.add(latency)
+
+    def rate(self):
+        # mean response rate in Hz since the start
+        mean = self.interval.mean()
+        return 1.0 / mean if mean else 0.0
+
+    def age(self, now = None):
+        """
+        Seconds since the last response, None if there was none yet.
+        """
+        if self.last_response is None:
+            return None
+        if now is None:
+            now = self.clock()
+        return now - self.last_response
+
+    def summary(self, now = None):
+        age = self.age(now)
+        return {
+            "requests": self.requests,
+            "responses": self.responses,
+            "timeouts": self.timeouts,
+            "rate_hz": self.rate(),
+            "age_s": age,
+            "latency_p50_s": self.latency.percentile(50),
+            "latency_p99_s": self.latency.percentile(99),
+            "latency_max_s": self.latency.max,
+            "interval_p50_s": self.interval.percentile(50),
+            "interval_p99_s": self.interval.percentile(99),
+            "interval_max_s": self.interval.max,
+        }
@@ -0,0 +1,586 @@
+/*
+ * _transformations.c
+ *
+ * Compiled versions of the functions of transformations.py that the nodes
+ * call at high rates. transformations.py imports this module through its
+ * _import_module hook when it was built, replacing quaternion_from_euler,
+ * quaternion_multiply, quaternion_matrix, euler_from_matrix, unit_vector and
+ * vector_norm and keeping the Python implementations as _py_<name>.
+ *
+ * The functions take the same arguments and give the same results as the
+ * Python ones. out arguments must be float64 arrays of the right shape.
+ * unit_vector and vector_norm handle one dimensional data without axis or
+ * out here and hand everything else to the Python implementations.
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include <float.h>
+#include <math.h>
+#include <string.h>
+
+#define NPY_NO_DEPRECATED_API NPY_1_7_API_VERSION
+#include <numpy/arrayobject.h>
+
+/* epsilon for testing whether a number is close to zero */
+#define EPS (DBL_EPSILON * 4.0)
+
+static const int NEXT_AXIS[4] = {1, 2, 0, 1};
+
+/* axes strings and their tuples of inner axis, parity, repetition, frame */
+static const struct {
+    const char *name;
+    int firstaxis, parity, repetition, frame;
+} AXES[24] = {
+    {"sxyz", 0, 0, 0, 0}, {"sxyx", 0, 0, 1, 0}, {"sxzy", 0, 1, 0, 0},
+    {"sxzx", 0, 1, 1, 0}, {"syzx", 1, 0, 0, 0}, {"syzy", 1, 0, 1, 0},
+    {"syxz", 1, 1, 0, 0}, {"syxy", 1, 1, 1, 0}, {"szxy", 2, 0, 0, 0},
+    {"szxz", 2, 0, 1, 0}, {"szyx", 2, 1, 0, 0}, {"szyz", 2, 1, 1, 0},
+    {"rzyx", 0, 0, 0, 1}, {"rxyx", 0, 0, 1, 1}, {"ryzx", 0, 1, 0, 1},
+    {"rxzx", 0, 1, 1, 1}, {"rxzy", 1, 0, 0, 1}, {"ryzy", 1, 0, 1, 1},
+    {"rzxy", 1, 1, 0, 1}, {"ryxy", 1, 1, 1, 1}, {"ryxz", 2, 0, 0, 1},
+    {"rzxz", 2, 0, 1, 1}, {"rxyz", 2, 1, 0, 1}, {"rzyz", 2, 1, 1, 1}};
+
+/*
+ * Look up an axes string, in any case, or encoded tuple. Raise KeyError
+ * and return -1 for anything else.
+ */
+static int
+parse_axes(PyObject *axes, int *firstaxis, int *parity, int *repetition,
+           int *frame)
+{
+    int i, n;
+    if (axes == NULL) {
+        *firstaxis = *parity = *repetition = *frame = 0;
+        return 0;
+    }
+    if (PyUnicode_Check(axes)) {
+        Py_ssize_t length;
+        const char *s = PyUnicode_AsUTF8AndSize(axes, &length);
+        if (s == NULL)
+            return -1;
+        if (length == 4) {
+            char lower[5];
+            for (n = 0; n < 4; n++)
+                lower[n] = (char)((s[n] >= 'A' && s[n] <= 'Z') ?
+                                  s[n] - 'A' + 'a' : s[n]);
+            lower[4] = '\0';
+            for (i = 0; i < 24; i++) {
+                if (strcmp(lower, AXES[i].name) == 0) {
+                    *firstaxis = AXES[i].firstaxis;
+                    *parity = AXES[i].parity;
+                    *repetition = AXES[i].repetition;
+                    *frame = AXES[i].frame;
+                    return 0;
+                }
+            }
+        }
+    }
+    else if (PyTuple_Check(axes) && PyTuple_GET_SIZE(axes) == 4) {
+        int values[4];
+        for (n = 0; n < 4; n++) {
+            PyObject *item = PyTuple_GET_ITEM(axes, n);
+            if (!PyLong_Check(item))
+                break;
+            values[n] = (int)PyLong_AsLong(item);
+        }
+        if (PyErr_Occurred())
+            return -1;
+        if (n == 4) {
+            for (i = 0; i < 24; i++) {
+                if (values[0] == AXES[i].firstaxis &&
+                    values[1] == AXES[i].parity &&
+                    values[2] == AXES[i].repetition &&
+                    values[3] == AXES[i].frame) {
+                    *firstaxis = values[0];
+                    *parity = values[1];
+                    *repetition = values[2];
+                    *frame = values[3];
+                    return 0;
+                }
+            }
+        }
+    }
+    PyErr_SetObject(PyExc_KeyError, axes);
+    return -1;
+}
+
+/*
+ * Read count floats from a float64 array of that size or any sequence of
+ * numbers.
+ */
+static int
+read_doubles(PyObject *obj, double *values, Py_ssize_t count)
+{
+    Py_ssize_t i;
+    PyObject *sequence;
+    if (PyArray_Check(obj)) {
+        PyArrayObject *array = (PyArrayObject *)obj;
+        if (PyArray_TYPE(array) == NPY_DOUBLE && PyArray_NDIM(array) == 1 &&
+            PyArray_DIM(array, 0) == count) {
+            char *data = PyArray_BYTES(array);
+            npy_intp stride = PyArray_STRIDE(array, 0);
+            for (i = 0; i < count; i++)
+                values[i] = *(double *)(data + i * stride);
+            return 0;
+        }
+    }
+    sequence = PySequence_Fast(obj, "expected a sequence of numbers");
+    if (sequence == NULL)
+        return -1;
+    if (PySequence_Fast_GET_SIZE(sequence) != count) {
+        PyErr_Format(PyExc_ValueError, "expected %zd values, got %zd",
+                     count, PySequence_Fast_GET_SIZE(sequence));
+        Py_DECREF(sequence);
+        return -1;
+    }
+    for (i = 0; i < count; i++) {
+        values[i] = PyFloat_AsDouble(PySequence_Fast_GET_ITEM(sequence, i));
+        if (values[i] == -1.0 && PyErr_Occurred()) {
+            Py_DECREF(sequence);
+            return -1;
+        }
+    }
+    Py_DECREF(sequence);
+    return 0;
+}
+
+/*
+ * Return a new float64 array of the given shape, or out, with a new
+ * reference, after checking it is a writeable float64 array of that shape.
+ */
+static PyArrayObject *
+output_array(PyObject *out, int ndim, npy_intp *shape)
+{
+    int i;
+    PyArrayObject *array;
+    if (out == NULL || out == Py_None)
+        return (PyArrayObject *)PyArray_SimpleNew(ndim, shape, NPY_DOUBLE);
+    if (!PyArray_Check(out))
+        goto invalid;
+    array = (PyArrayObject *)out;
+    if (PyArray_TYPE(array) != NPY_DOUBLE || PyArray_NDIM(array) != ndim ||
+        !PyArray_ISWRITEABLE(array) || !PyArray_ISALIGNED(array))
+        goto invalid;
+    for (i = 0; i < ndim; i++) {
+        if (PyArray_DIM(array, i) != shape[i])
+            goto invalid;
+    }
+    Py_INCREF(out);
+    return array;
+  invalid:
+    if (ndim == 1)
+        PyErr_Format(PyExc_ValueError,
+                     "out must be a float64 array of shape (%zd, )",
+                     (Py_ssize_t)shape[0]);
+    else
+        PyErr_Format(PyExc_ValueError,
+                     "out must be a float64 array of shape (%zd, %zd)",
+                     (Py_ssize_t)shape[0], (Py_ssize_t)shape[1]);
+    return NULL;
+}
+
+#define ITEM1(array, i) \
+    (*(double *)(PyArray_BYTES(array) + (i) * PyArray_STRIDE(array, 0)))
+
+#define ITEM2(array, i, j) \
+    (*(double *)(PyArray_BYTES(array) + (i) * PyArray_STRIDE(array, 0) + \
+                 (j) * PyArray_STRIDE(array, 1)))
+
+/* Python implementation of a function, for the cases not handled here */
+static PyObject *
+python_fallback(const char *name)
+{
+    PyObject *module, *function;
+    module = PyImport_ImportModule("transformations");
+    if (module == NULL)
+        return NULL;
+    function = PyObject_GetAttrString(module, name);
+    Py_DECREF(module);
+    return function;
+}
+
+static PyObject *
+call_fallback(const char *name, PyObject *args, PyObject *kwargs)
+{
+    PyObject *function, *result;
+    function = python_fallback(name);
+    if (function == NULL)
+        return NULL;
+    result = PyObject_Call(function, args, kwargs);
+    Py_DECREF(function);
+    return result;
+}
+
+PyDoc_STRVAR(quaternion_from_euler_doc,
+"quaternion_from_euler(ai, aj, ak, axes='sxyz', out=None)\n\n"
+"Return quaternion from Euler angles and axis sequence.");
+
+static PyObject *
+quaternion_from_euler(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"ai", "aj", "ak", "axes", "out", NULL};
+    double ai, aj, ak, ci, si, cj, sj, ck, sk, cc, cs, sc, ss, t;
+    double q[4];
+    int firstaxis, parity, repetition, frame, i, j, k, n;
+    PyObject *axes = NULL, *out = NULL;
+    PyArrayObject *result;
+    npy_intp shape[1] = {4};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "ddd|OO", kwlist,
+                                     &ai, &aj, &ak, &axes, &out))
+        return NULL;
+    if (parse_axes(axes, &firstaxis, &parity, &repetition, &frame) < 0)
+        return NULL;
+
+    i = firstaxis + 1;
+    j = NEXT_AXIS[i+parity-1] + 1;
+    k = NEXT_AXIS[i-parity] + 1;
+
+    if (frame) {
+        t = ai;
+        ai = ak;
+        ak = t;
+    }
+    if (parity)
+        aj = -aj;
+
+    ai /= 2.0;
+    aj /= 2.0;
+    ak /= 2.0;
+    ci = cos(ai);
+    si = sin(ai);
+    cj = cos(aj);
+    sj = sin(aj);
+    ck = cos(ak);
+    sk = sin(ak);
+    cc = ci*ck;
+    cs = ci*sk;
+    sc = si*ck;
+    ss = si*sk;
+
+    if (repetition) {
+        q[0] = cj*(cc - ss);
+        q[i] = cj*(cs + sc);
+        q[j] = sj*(cc + ss);
+        q[k] = sj*(cs - sc);
+    }
+    else {
+        q[0] = cj*cc + sj*ss;
+        q[i] = cj*sc - sj*cs;
+        q[j] = cj*ss + sj*cc;
+        q[k] = cj*cs - sj*sc;
+    }
+    if (parity)
+        q[j] *= -1.0;
+
+    result = output_array(out, 1, shape);
+    if (result == NULL)
+        return NULL;
+    for (n = 0; n < 4; n++)
+        ITEM1(result, n) = q[n];
+    return (PyObject *)result;
+}
+
+PyDoc_STRVAR(quaternion_multiply_doc,
+"quaternion_multiply(quaternion1, quaternion0, out=None)\n\n"
+"Return multiplication of two quaternions.");
+
+static PyObject *
+quaternion_multiply(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"quaternion1", "quaternion0", "out", NULL};
+    PyObject *quaternion1, *quaternion0, *out = NULL;
+    PyArrayObject *result;
+    double q0[4], q1[4];
+    double w0, x0, y0, z0, w1, x1, y1, z1;
+    npy_intp shape[1] = {4};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OO|O", kwlist,
+                                     &quaternion1, &quaternion0, &out))
+        return NULL;
+    if (read_doubles(quaternion0, q0, 4) < 0 ||
+        read_doubles(quaternion1, q1, 4) < 0)
+        return NULL;
+    w0 = q0[0]; x0 = q0[1]; y0 = q0[2]; z0 = q0[3];
+    w1 = q1[0]; x1 = q1[1]; y1 = q1[2]; z1 = q1[3];
+
+    result = output_array(out, 1, shape);
+    if (result == NULL)
+        return NULL;
+    ITEM1(result, 0) = -x1*x0 - y1*y0 - z1*z0 + w1*w0;
+    ITEM1(result, 1) = x1*w0 + y1*z0 - z1*y0 + w1*x0;
+    ITEM1(result, 2) = -x1*z0 + y1*w0 + z1*x0 + w1*y0;
+    ITEM1(result, 3) = x1*y0 - y1*x0 + z1*w0 + w1*z0;
+    return (PyObject *)result;
+}
+
+PyDoc_STRVAR(quaternion_matrix_doc,
+"quaternion_matrix(quaternion, out=None)\n\n"
+"Return homogeneous rotation matrix from quaternion.");
+
+static PyObject *
+quaternion_matrix(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"quaternion", "out", NULL};
+    PyObject *quaternion, *out = NULL;
+    PyArrayObject *result;
+    double q[4], M[4][4];
+    double w, x, y, z, n, s, xx, yy, zz, xy, xz, yz, wx, wy, wz;
+    int i, j;
+    npy_intp shape[2] = {4, 4};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|O", kwlist,
+                                     &quaternion, &out))
+        return NULL;
+    if (read_doubles(quaternion, q, 4) < 0)
+        return NULL;
+    w = q[0]; x = q[1]; y = q[2]; z = q[3];
+
+    memset(M, 0, sizeof(M));
+    M[0][0] = M[1][1] = M[2][2] = M[3][3] = 1.0;
+    n = w*w + x*x + y*y + z*z;
+    if (n >= EPS) {
+        s = 2.0 / n;
+        xx = s*x*x;
+        yy = s*y*y;
+        zz = s*z*z;
+        xy = s*x*y;
+        xz = s*x*z;
+        yz = s*y*z;
+        wx = s*w*x;
+        wy = s*w*y;
+        wz = s*w*z;
+        M[0][0] = 1.0-yy-zz;
+        M[0][1] = xy-wz;
+        M[0][2] = xz+wy;
+        M[1][0] = xy+wz;
+        M[1][1] = 1.0-xx-zz;
+        M[1][2] = yz-wx;
+        M[2][0] = xz-wy;
+        M[2][1] = yz+wx;
+        M[2][2] = 1.0-xx-yy;
+    }
+
+    result = output_array(out, 2, shape);
+    if (result == NULL)
+        return NULL;
+    for (i = 0; i < 4; i++) {
+        for (j = 0; j < 4; j++)
+            ITEM2(result, i, j) = M[i][j];
+    }
+    return (PyObject *)result;
+}
+
+PyDoc_STRVAR(euler_from_matrix_doc,
+"euler_from_matrix(matrix, axes='sxyz')\n\n"
+"Return Euler angles from rotation matrix for specified axis sequence.");
+
+static PyObject *
+euler_from_matrix(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"matrix", "axes", NULL};
+    PyObject *matrix, *axes = NULL;
+    PyArrayObject *array;
+    double M[3][3], ax, ay, az, sy, cy, t;
+    int firstaxis, parity, repetition, frame, i, j, k, n, m;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|O", kwlist,
+                                     &matrix, &axes))
+        return NULL;
+    if (parse_axes(axes, &firstaxis, &parity, &repetition, &frame) < 0)
+        return NULL;
+
+    array = (PyArrayObject *)PyArray_FROMANY(matrix, NPY_DOUBLE, 2, 2,
+                                             NPY_ARRAY_ALIGNED);
+    if (array == NULL)
+        return NULL;
+    if (PyArray_DIM(array, 0) < 3 || PyArray_DIM(array, 1) < 3) {
+        Py_DECREF(array);
+        PyErr_SetString(PyExc_ValueError, "matrix must be at least 3x3");
+        return NULL;
+    }
+    for (n = 0; n < 3; n++) {
+        for (m = 0; m < 3; m++)
+            M[n][m] = ITEM2(array, n, m);
+    }
+    Py_DECREF(array);
+
+    i = firstaxis;
+    j = NEXT_AXIS[i+parity];
+    k = NEXT_AXIS[i-parity+1];
+
+    if (repetition) {
+        sy = sqrt(M[i][j]*M[i][j] + M[i][k]*M[i][k]);
+        if (sy > EPS) {
+            ax = atan2( M[i][j],  M[i][k]);
+            ay = atan2( sy,       M[i][i]);
+            az = atan2( M[j][i], -M[k][i]);
+        }
+        else {
+            ax = atan2(-M[j][k],  M[j][j]);
+            ay = atan2( sy,       M[i][i]);
+            az = 0.0;
+        }
+    }
+    else {
+        cy = sqrt(M[i][i]*M[i][i] + M[j][i]*M[j][i]);
+        if (cy > EPS) {
+            ax = atan2( M[k][j],  M[k][k]);
+            ay = atan2(-M[k][i],  cy);
+            az = atan2( M[j][i],  M[i][i]);
+        }
+        else {
+            ax = atan2(-M[j][k],  M[j][j]);
+            ay = atan2(-M[k][i],  cy);
+            az = 0.0;
+        }
+    }
+
+    if (parity) {
+        ax = -ax;
+        ay = -ay;
+        az = -az;
+    }
+    if (frame) {
+        t = ax;
+        ax = az;
+        az = t;
+    }
+    return Py_BuildValue("(ddd)", ax, ay, az);
+}
+
+/*
+ * data as a new contiguous one dimensional float64 array, or NULL without
+ * an exception set if it isn't one dimensional.
+ */
+static PyArrayObject *
+vector_array(PyObject *data)
+{
+    PyArrayObject *array;
+    array = (PyArrayObject *)PyArray_FROMANY(data, NPY_DOUBLE, 0, 0,
+                                             NPY_ARRAY_CARRAY_RO);
+    if (array == NULL)
+        return NULL;
+    if (PyArray_NDIM(array) != 1) {
+        Py_DECREF(array);
+        return NULL;
+    }
+    return array;
+}
+
+static double
+sum_of_squares(PyArrayObject *array)
+{
+    npy_intp i, size = PyArray_DIM(array, 0);
+    const double *values = (const double *)PyArray_DATA(array);
+    double sum = 0.0;
+    for (i = 0; i < size; i++)
+        sum += values[i] * values[i];
+    return sum;
+}
+
+PyDoc_STRVAR(vector_norm_doc,
+"vector_norm(data, axis=None, out=None)\n\n"
+"Return length, i.e. Euclidean norm, of ndarray along axis.");
+
+static PyObject *
+vector_norm(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"data", "axis", "out", NULL};
+    PyObject *data, *axis = Py_None, *out = Py_None;
+    PyArrayObject *array;
+    double norm;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|OO", kwlist,
+                                     &data, &axis, &out))
+        return NULL;
+    if (axis != Py_None || out != Py_None)
+        return call_fallback("_py_vector_norm", args, kwargs);
+    array = vector_array(data);
+    if (array == NULL) {
+        if (PyErr_Occurred())
+            return NULL;
+        return call_fallback("_py_vector_norm", args, kwargs);
+    }
+    norm = sqrt(sum_of_squares(array));
+    Py_DECREF(array);
+    return PyFloat_FromDouble(norm);
+}
+
+PyDoc_STRVAR(unit_vector_doc,
+"unit_vector(data, axis=None, out=None)\n\n"
+"Return ndarray normalized by length, i.e. Euclidean norm, along axis.");
+
+static PyObject *
+unit_vector(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"data", "axis", "out", NULL};
+    PyObject *data, *axis = Py_None, *out = Py_None;
+    PyArrayObject *array, *result;
+    npy_intp i, size;
+    double length;
+    const double *values;
+    double *unit;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|OO", kwlist,
+                                     &data, &axis, &out))
+        return NULL;
+    if (out != Py_None)
+        return call_fallback("_py_unit_vector", args, kwargs);
+    array = vector_array(data);
+    if (array == NULL) {
+        if (PyErr_Occurred())
+            return NULL;
+        return call_fallback("_py_unit_vector", args, kwargs);
+    }
+    size = PyArray_DIM(array, 0);
+    result = (PyArrayObject *)PyArray_SimpleNew(1, &size, NPY_DOUBLE);
+    if (result == NULL) {
+        Py_DECREF(array);
+        return NULL;
+    }
+    length = sqrt(sum_of_squares(array));
+    values = (const double *)PyArray_DATA(array);
+    unit = (double *)PyArray_DATA(result);
+    for (i = 0; i < size; i++)
+        unit[i] = values[i] / length;
+    Py_DECREF(array);
+    return (PyObject *)result;
+}
+
+static PyMethodDef methods[] = {
+    {"quaternion_from_euler", (PyCFunction)(void (*)(void))quaternion_from_euler,
+     METH_VARARGS | METH_KEYWORDS, quaternion_from_euler_doc},
+    {"quaternion_multiply", (PyCFunction)(void (*)(void))quaternion_multiply,
+     METH_VARARGS | METH_KEYWORDS, quaternion_multiply_doc},
+    {"quaternion_matrix", (PyCFunction)(void (*)(void))quaternion_matrix,
+     METH_VARARGS | METH_KEYWORDS, quaternion_matrix_doc},
+    {"euler_from_matrix", (PyCFunction)(void (*)(void))euler_from_matrix,
+     METH_VARARGS | METH_KEYWORDS, euler_from_matrix_doc},
+    {"vector_norm", (PyCFunction)(void (*)(void))vector_norm,
+     METH_VARARGS | METH_KEYWORDS, vector_norm_doc},
+    {"unit_vector", (PyCFunction)(void (*)(void))unit_vector,
+     METH_VARARGS | METH_KEYWORDS, unit_vector_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef module = {
+    PyModuleDef_HEAD_INIT,
+    "_transformations",
+    "Compiled versions of the hot functions of transformations.py.",
+    -1,
+    methods,
+    NULL,
+    NULL,
+    NULL,
+    NULL
+};
+
+PyMODINIT_FUNC
+PyInit__transformations(void)
+{
+    import_array();
+    return PyModule_Create(&module);
+}